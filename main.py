@@ -1,11 +1,16 @@
-import json
 import time
 import argparse
 import sys
 import asyncio
 import redis.asyncio as redis
 
+try:
+    import uvloop  # optional: faster event loop (not available on Windows)
+except ImportError:
+    uvloop = None
+
 from src.router import RedisRouter, SocketRouter
+from src.packet import json_loads
 from src.utils import setup_colored_logging, Colors
 
 setup_colored_logging()
@@ -19,37 +24,47 @@ def main():
     parser.add_argument("--names", required=True, help="Node names and addresses file")
     parser.add_argument("--mode", choices=["socket", "redis"], default="redis",
                        help="Communication mode: socket or redis")
+    parser.add_argument("--interactive", action=argparse.BooleanOptionalAction, default=True,
+                       help="Read commands from stdin (--no-interactive for headless routers)")
     
     args = parser.parse_args()
 
     if args.mode == "redis":
-        asyncio.run(main_redis(args))
+        if uvloop is not None:
+            uvloop.run(main_redis(args))
+        else:
+            asyncio.run(main_redis(args))
     else:
         asyncio.run(main_socket(args))
 
+def load_config(path):
+    """Parse a JSON config file once so it can be shared with the router"""
+    with open(path, 'rb') as f:
+        return json_loads(f.read())
+
 async def main_redis(args):
     """Main function for Redis mode"""
     router = None
     try:
         # Load Redis configuration from names file
-        with open(args.names, 'r') as f:
-            names_data = json.load(f)
-            if names_data.get("type") != "names":
-                raise ValueError("Invalid names file format")
-            
-            redis_host = names_data.get("host", "localhost")
-            redis_port = names_data.get("port", 6379)
-            redis_password = names_data.get("pwd", "")
-            
-            if args.id not in names_data["config"]:
-                raise ValueError(f"Router ID '{args.id}' not found in names file")
+        names_data = load_config(args.names)
+        if names_data.get("type") != "names":
+            raise ValueError("Invalid names file format")
+        
+        redis_host = names_data.get("host", "localhost")
+        redis_port = names_data.get("port", 6379)
+        redis_password = names_data.get("pwd", "")
+        
+        if args.id not in names_data["config"]:
+            raise ValueError(f"Router ID '{args.id}' not found in names file")
         
         # Create Redis router
         router = RedisRouter(args.id, redis_host, redis_port, redis_password, args.algorithm)
+        router.interactive = args.interactive
         
-        # Load topology and channels
-        router.load_topology(args.topo)
-        router.load_node_channels(args.names)
+        # Load topology and channels (names file is reused, not re-read)
+        router.load_topology(load_config(args.topo))
+        router.load_node_channels(names_data)
         
         # Start router
         await router.start()
@@ -70,25 +85,25 @@ async def main_socket(args):
     """Main function for Socket mode"""
     try:
         # Load node addresses first to get this router's address
-        with open(args.names, 'r') as f:
-            names_data = json.load(f)
-            if names_data.get("type") != "names":
-                raise ValueError("Invalid names file format")
-            
-            node_addresses = names_data["config"]
-            if args.id not in node_addresses:
-                raise ValueError(f"Router ID '{args.id}' not found in names file")
-            
-            router_addr = node_addresses[args.id]
-            host = router_addr.get("host", "localhost")
-            port = router_addr["port"]
+        names_data = load_config(args.names)
+        if names_data.get("type") != "names":
+            raise ValueError("Invalid names file format")
+        
+        node_addresses = names_data["config"]
+        if args.id not in node_addresses:
+            raise ValueError(f"Router ID '{args.id}' not found in names file")
+        
+        router_addr = node_addresses[args.id]
+        host = router_addr.get("host", "localhost")
+        port = router_addr["port"]
         
         # Create socket router
         router = SocketRouter(args.id, host, port, args.algorithm)
+        router.interactive = args.interactive
         
-        # Load topology and names
-        router.load_topology(args.topo)
-        router.load_node_addresses(args.names)
+        # Load topology and names (names file is reused, not re-read)
+        router.load_topology(load_config(args.topo))
+        router.load_node_addresses(names_data)
         
         # Start router
         await router.start()
@@ -5,6 +5,8 @@ from src.packet import Packet
 class RoutingAlgorithm(ABC):
     """Abstract base class for routing algorithms"""
     
+    needs_full_topology = False  # True: router passes the whole topology file via set_topology()
+    
     def __init__(self, router_id: str):
         self.router_id = router_id
         self.routing_table = {}  # destination -> next_hop mapping
@@ -28,3 +30,15 @@ class RoutingAlgorithm(ABC):
     def update_neighbor(self, neighbor_id: str, neighbor_info: Dict):
         """Update neighbor information"""
         pass
+    
+    def on_neighbor_connected(self, neighbor_id: str):
+        """Transport link to a neighbor came up (default: nothing to do)"""
+        pass
+    
+    def stop(self):
+        """Release background resources when the router stops (default: nothing to do)"""
+        pass
+    
+    def debug_fields(self) -> List[Tuple[str, Any]]:
+        """Algorithm-specific (label, value) pairs for the router's debug command"""
+        return []
@@ -1,3 +1,5 @@
+import heapq
+from collections import defaultdict
 from src.algorithms.base import RoutingAlgorithm
 from typing import Dict, List, Optional, Tuple, Any
 from src.packet import Packet
@@ -5,10 +7,13 @@ from src.packet import Packet
 class DijkstraAlgorithm(RoutingAlgorithm):
     """Dijkstra's shortest path routing algorithm - calculates paths once on startup"""
     
+    needs_full_topology = True
+    
     def __init__(self, router_id: str):
         super().__init__(router_id)
         self.topology = {}  # Full network topology: {node: [neighbors]}
-        self.link_costs = {}  # Edge costs: {(node1, node2): cost}
+        self.adj = {}  # Adjacency with inline costs: {node: [(neighbor, cost)]}
+        self.full_paths = {}  # Shortest path per destination: {dest: [router_id, ..., dest]}
         self.calculated = False  # Flag to ensure we only calculate once
     
     def get_name(self) -> str:
@@ -32,20 +37,17 @@ class DijkstraAlgorithm(RoutingAlgorithm):
     def set_topology(self, topology: Dict):
         """Set the full network topology and calculate shortest paths"""
         self.topology = topology
-        self._initialize_link_costs()
+        self._build_adjacency()
         self._calculate_shortest_paths()
         self.calculated = True
         print(f"📊 Dijkstra: Initialized with topology: {topology}")
     
-    def _initialize_link_costs(self):
-        """Initialize all link costs to 1 (can be modified for weighted graphs)"""
-        self.link_costs.clear()
-        
-        for node, neighbors in self.topology.items():
-            for neighbor in neighbors:
-                # Create bidirectional links with cost 1
-                self.link_costs[(node, neighbor)] = 1
-                self.link_costs[(neighbor, node)] = 1
+    def _build_adjacency(self):
+        """Build adjacency lists with all link costs set to 1 (can be modified for weighted graphs)"""
+        self.adj = {
+            node: [(neighbor, 1) for neighbor in neighbors]
+            for node, neighbors in self.topology.items()
+        }
     
     def _calculate_shortest_paths(self):
         """Calculate shortest paths from this router to all other nodes using Dijkstra's algorithm"""
@@ -53,6 +55,7 @@ class DijkstraAlgorithm(RoutingAlgorithm):
         
         # Clear routing table
         self.routing_table.clear()
+        self.full_paths.clear()
         
         # Get all nodes in the topology
         all_nodes = set(self.topology.keys())
@@ -61,45 +64,48 @@ class DijkstraAlgorithm(RoutingAlgorithm):
         for neighbors in self.topology.values():
             all_nodes.update(neighbors)
         
-        # Initialize distances and predecessors
+        # Initialize distances and predecessors (unreached nodes stay at infinity)
         distances = {node: float('inf') for node in all_nodes}
         distances[self.router_id] = 0
         predecessors = {}
-        unvisited = all_nodes.copy()
+        visited = set()
+        heap = [(0, self.router_id)]
         
         print(f"🌐 All nodes in topology: {sorted(all_nodes)}")
         
-        # Dijkstra's algorithm
-        while unvisited:
-            # Find unvisited node with minimum distance
-            current = min(unvisited, key=lambda x: distances[x])
-            
-            if distances[current] == float('inf'):
-                # No more reachable nodes
-                break
-            
-            unvisited.remove(current)
-            
-            # Get neighbors of current node
-            current_neighbors = self.topology.get(current, [])
+        # Dijkstra's algorithm (lazy heap: stale entries are skipped on pop)
+        while heap:
+            current_distance, current = heapq.heappop(heap)
+            if current in visited:
+                continue
+            visited.add(current)
             
-            for neighbor in current_neighbors:
-                if neighbor in unvisited:
-                    # Calculate new distance through current node
-                    edge_cost = self.link_costs.get((current, neighbor), 1)
-                    new_distance = distances[current] + edge_cost
-                    
-                    if new_distance < distances[neighbor]:
-                        distances[neighbor] = new_distance
-                        predecessors[neighbor] = current
-        
-        # Build routing table from shortest paths
-        for destination in all_nodes:
-            if destination != self.router_id and distances[destination] != float('inf'):
-                # Trace back path to find next hop
-                next_hop = self._find_next_hop(destination, predecessors)
-                if next_hop:
-                    self.routing_table[destination] = next_hop
+            for neighbor, edge_cost in self.adj.get(current, ()):
+                if neighbor in visited:
+                    continue
+                # Calculate new distance through current node
+                new_distance = current_distance + edge_cost
+                
+                if new_distance < distances[neighbor]:
+                    distances[neighbor] = new_distance
+                    predecessors[neighbor] = current
+                    heapq.heappush(heap, (new_distance, neighbor))
+        
+        # Build routing table in a single pass over the shortest-path tree:
+        # every node below a direct child of this router shares that child as next hop
+        children = defaultdict(list)
+        for node, pred in predecessors.items():
+            children[pred].append(node)
+        
+        # (the full path is recorded on the way down as well)
+        for first_hop in children.get(self.router_id, []):
+            stack = [(first_hop, [self.router_id, first_hop])]
+            while stack:
+                node, path = stack.pop()
+                self.routing_table[node] = first_hop
+                self.full_paths[node] = path
+                for child in children.get(node, []):
+                    stack.append((child, path + [child]))
         
         # Log the results
         print(f"🗺️ Dijkstra routing table for {self.router_id}:")
@@ -112,50 +118,9 @@ class DijkstraAlgorithm(RoutingAlgorithm):
         
         print(f"📏 Distance table: {dict(sorted(distances.items()))}")
     
-    def _find_next_hop(self, destination: str, predecessors: Dict) -> Optional[str]:
-        """Find the next hop by tracing back the shortest path"""
-        if destination not in predecessors:
-            return None
-        
-        # Trace path from destination back to source
-        path = []
-        current = destination
-        
-        while current != self.router_id:
-            path.append(current)
-            if current not in predecessors:
-                return None  # No path exists
-            current = predecessors[current]
-        
-        # Path is now [destination, ..., next_hop]
-        # Return the last element which is our next hop
-        if path:
-            return path[-1]
-        
-        return None
+    def debug_fields(self) -> List[Tuple[str, Any]]:
+        return [("Topology", self.topology)]
     
     def get_full_path(self, destination: str) -> List[str]:
         """Get the full path to destination (useful for debugging)"""
-        if destination not in self.routing_table:
-            return []
-        
-        # Recalculate path for debugging
-        path = [self.router_id]
-        current = self.router_id
-        
-        # Follow routing table to build path
-        visited = set()
-        while current != destination and current not in visited:
-            visited.add(current)
-            next_hop = self.routing_table.get(destination) if current == self.router_id else None
-            
-            # For intermediate nodes, we'd need to query their routing tables
-            # For now, just show the next hop
-            if next_hop and next_hop != destination:
-                path.append(next_hop)
-                current = next_hop
-            else:
-                path.append(destination)
-                break
-        
-        return path
\ No newline at end of file
+        return list(self.full_paths.get(destination, []))
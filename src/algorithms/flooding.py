@@ -1,7 +1,8 @@
 # flooding.py
+from collections import deque
 from typing import Dict, List, Optional
 from src.algorithms.base import RoutingAlgorithm
-from src.packet import Packet
+from src.packet import Packet, BROADCAST_ADDRS
 
 class FloodingAlgorithm(RoutingAlgorithm):
     """
@@ -11,6 +12,8 @@ class FloodingAlgorithm(RoutingAlgorithm):
       - uses headers as a 3-entry rolling window to detect loops (cycle detection)
     """
 
+    PATH_WINDOW = 3
+
     def __init__(self, router_id: str):
         super().__init__(router_id)
         self.neighbors: Dict[str, dict] = {}
@@ -32,6 +35,12 @@ class FloodingAlgorithm(RoutingAlgorithm):
         # routing_table not needed for pure flooding, but keep interface
         self.routing_table[neighbor_id] = neighbor_id
 
+    def _append_to_path(self, packet: Packet, headers_path: List[str]):
+        """Append this router to the packet path, keeping only the last PATH_WINDOW hops"""
+        window = deque(headers_path, maxlen=self.PATH_WINDOW)
+        window.append(self.router_id)
+        packet.set_path(window)
+
     def process_packet(self, packet: Packet, from_neighbor_id: str) -> Optional[str]:
         """
         Decide what to do with an incoming packet.
@@ -45,7 +54,7 @@ class FloodingAlgorithm(RoutingAlgorithm):
         """
 
         # Access path in headers in a safe way
-        headers_path = packet.get_path()  # always returns list
+        headers_path = packet.get_path_view()  # always a list; read-only view, no copy
 
         # 1) HELLO = neighbor introduction -> don't retransmit
         if packet.type == "hello":
@@ -53,18 +62,13 @@ class FloodingAlgorithm(RoutingAlgorithm):
             return None
 
         # 2) INFO or broadcasted packets -> need to flood with headers management
-        if packet.to_addr in ["broadcast", "multicast"] or packet.type == "info":
+        if packet.to_addr in BROADCAST_ADDRS or packet.type == "info":
             # Cycle detection: if this router already appears in headers -> drop
             if self.router_id in headers_path:
                 return None
 
-            # Maintain rolling window of last 3 routers:
-            # When forwarding, remove first element if >=3 and append our own id.
-            new_path = list(headers_path)
-            if len(new_path) >= 3:
-                new_path.pop(0)
-            new_path.append(self.router_id)
-            packet.set_path(new_path)
+            # Maintain rolling window of last 3 routers (oldest entry drops out)
+            self._append_to_path(packet, headers_path)
 
             # TTL should be checked/handled by caller (router) before actually sending.
             if packet.ttl <= 0:
@@ -77,11 +81,7 @@ class FloodingAlgorithm(RoutingAlgorithm):
         if packet.type == "message":
             if packet.to_addr == self.router_id:
                 return None
-            new_path = list(headers_path)
-            if len(new_path) >= 3:
-                new_path.pop(0)
-            new_path.append(self.router_id)
-            packet.set_path(new_path)
+            self._append_to_path(packet, headers_path)
             if packet.ttl <= 0:
                 return None
             return "flood"
@@ -1,11 +1,37 @@
-import json
+import heapq
+import logging
+import sys
 import time
-import uuid
 import threading
-from typing import Dict, Optional, Any, Tuple, Set
-from collections import defaultdict, deque
+from typing import Dict, List, Optional, Any, Tuple, Set
 from src.algorithms.base import RoutingAlgorithm
-from src.packet import Packet
+from src.packet import Packet, json_dumps_bytes, json_loads, new_msg_id
+
+
+class NeighborState:
+    """Estado de un vecino directo (uno por vecino, se muta en cada HELLO)."""
+    __slots__ = ("cost", "last_seen", "alive")
+
+    def __init__(self, cost: int = 1, last_seen: float = 0.0, alive: bool = False):
+        self.cost = cost
+        self.last_seen = last_seen
+        self.alive = alive
+
+    def __repr__(self) -> str:
+        return f"NeighborState(cost={self.cost}, last_seen={self.last_seen}, alive={self.alive})"
+
+
+class LSDBEntry:
+    """Entrada de la LSDB: última LSA aceptada de un origin."""
+    __slots__ = ("seq", "neighbors", "last_received")
+
+    def __init__(self, seq: int, neighbors: Dict[str, int], last_received: float):
+        self.seq = seq
+        self.neighbors = neighbors
+        self.last_received = last_received
+
+    def __repr__(self) -> str:
+        return f"LSDBEntry(seq={self.seq}, neighbors={self.neighbors}, last_received={self.last_received})"
 
 
 class LinkStateRouting(RoutingAlgorithm):
@@ -26,57 +52,108 @@ class LinkStateRouting(RoutingAlgorithm):
       - headers.msg_id = id único para deduplicación (router.py mantiene LRU).
     """
 
-    # Timers (segundos)
+    # Timers (segundos). Los intervalos se miden con time.monotonic(); time.time()
+    # solo para los "ts" visibles en headers/payload.
     HELLO_INTERVAL = 5.0
     NEIGHBOR_TIMEOUT = 20.0
     LSA_MIN_INTERVAL = 8.0
     LSA_REFRESH_INTERVAL = 30.0
     LSA_MAX_AGE = 90.0
+    SPF_DEBOUNCE = 0.02  # agrupa ráfagas de cambios en un solo SPF
 
     def __init__(self, router_id: str):
-        super().__init__(router_id)
-
-        # Estado de vecinos: nb -> {cost,last_seen,alive}
-        self.neighbor_states: Dict[str, Dict[str, Any]] = {}
-        # Base de estado de enlaces (LSDB): origin -> {seq, neighbors{}, last_received}
-        self.link_state_db: Dict[str, Dict[str, Any]] = {}
+        super().__init__(sys.intern(router_id))
+
+        # Estado de vecinos: nb -> NeighborState(cost, last_seen, alive)
+        self.neighbor_states: Dict[str, NeighborState] = {}
+        # Índice de vecinos vivos: nb -> costo (se mantiene en cada cambio de alive/cost)
+        self._alive_neighbors: Dict[str, int] = {}
+        # Base de estado de enlaces (LSDB): origin -> LSDBEntry(seq, neighbors{}, last_received)
+        self.link_state_db: Dict[str, LSDBEntry] = {}
+        # Heap de vencimientos (expira_en, origin, seq); entradas con seq viejo se descartan al sacarlas
+        self._lsdb_expiry: List[Tuple[float, str, int]] = []
+        # Grafo del área (simétrico) que consume el SPF: u -> {v: costo}. Se mantiene
+        # incrementalmente con _refresh_edge en cada cambio de vecinos/LSDB
+        self._adj: Dict[str, Dict[str, int]] = {}
         # Conjunto de routers "vistos" en el área
-        self.area_routers: Set[str] = set([router_id])
+        self.area_routers: Set[str] = {self.router_id}
 
         # Control LSA propio
         self.my_lsa_seq: int = 0
-        self.last_lsa_time: float = 0.0
+        self.last_lsa_time: float = float("-inf")
         self.topology_changed: bool = True
-        self.last_hello_time: float = 0.0
-
-        # Filtro de duplicados de LSA (origin, seq)
-        self.lsa_seen: Set[Tuple[str, int]] = set()
-        self.lsa_fifo: deque[Tuple[str, int]] = deque()
-        self.lsa_capacity: int = 50000
-
-        # Concurrencia
-        self._lock = threading.RLock()
+        self.last_hello_time: float = float("-inf")
+        # Próximos vencimientos (monotonic), se actualizan al emitir
+        self.next_hello_due_at: float = float("-inf")
+        self._lsa_min_due_at: float = float("-inf")      # si hubo cambio de topología
+        self._lsa_refresh_due_at: float = float("-inf")  # refresco periódico
+
+        # Filtro de duplicados de LSA: seq es creciente por origin, basta el máximo visto
+        # (duplicada u obsoleta <=> seq <= max_seq[origin])
+        self.max_seq: Dict[str, int] = {}
+
+        # Concurrencia: Lock simple (nunca se toma anidado). routing_table se publica
+        # reemplazando el dict completo, así get_next_hop lee sin lock.
+        self._lock = threading.Lock()
+
+        # Versión del grafo: sube con cada cambio que afecta al SPF; si no cambió
+        # desde el último cálculo, calculateRoutes reutiliza la routing_table actual
+        self._topo_version: int = 0
+        self._spf_version: int = -1
+
+        # SPF diferido: los cambios marcan _spf_dirty y un hilo recalcula una vez por ráfaga
+        self._spf_dirty = threading.Event()
+        self._spf_stop = threading.Event()
+        self._spf_thread = threading.Thread(
+            target=self._spf_loop, name=f"lsr-spf-{router_id}", daemon=True
+        )
+        self._spf_thread.start()
 
     # ===== API requerida por router.py =====
 
     def get_name(self) -> str:
         return "lsr"
 
+    def stop(self):
+        """Detiene el hilo SPF (lo llama el router en su stop())."""
+        self._spf_stop.set()
+        self._spf_dirty.set()  # despierta al hilo si está esperando cambios
+
     def update_neighbor(self, neighbor_id: str, neighbor_info: Dict):
         """
         Actualiza/crea registro de vecino a partir de información del Router:
         neighbor_info puede incluir "cost" y metadatos (canal, etc).
         """
         cost = int(neighbor_info.get("cost", 1))
-        now = time.time()
+        now = time.monotonic()
+        neighbor_id = sys.intern(neighbor_id)
         with self._lock:
-            st = self.neighbor_states.get(neighbor_id, {})
-            st.update({"cost": cost, "last_seen": now, "alive": True})
-            self.neighbor_states[neighbor_id] = st
+            st = self.neighbor_states.get(neighbor_id)
+            if st is None:
+                st = self.neighbor_states[neighbor_id] = NeighborState()
+            changed = st.cost != cost or not st.alive
+            st.cost = cost
+            st.last_seen = now
+            st.alive = True
+            self._alive_neighbors[neighbor_id] = cost
+            if changed:
+                self._topo_version += 1
+                self._refresh_edge(self.router_id, neighbor_id)
             # table mínima para "vecino directo"
             self.neighbors[neighbor_id] = {"cost": cost}
             self.topology_changed = True
 
+    def on_neighbor_connected(self, neighbor_id: str):
+        """El transporte levantó el enlace: el vecino queda vivo con costo 1."""
+        self.update_neighbor(neighbor_id, {"cost": 1})
+
+    def debug_fields(self) -> List[Tuple[str, Any]]:
+        return [
+            ("LSA Database", list(self.link_state_db.keys())),
+            ("Area Routers", list(self.area_routers)),
+            ("Neighbor States", list(self.neighbor_states.keys())),
+        ]
+
     def process_packet(self, packet: Packet, from_neighbor: str) -> Optional[str]:
         """
         Procesa paquetes recibidos y decide:
@@ -86,39 +163,50 @@ class LinkStateRouting(RoutingAlgorithm):
           - "flood": (no usado aquí; reservado)
         """
         # Asegura msg_id sin mutar la forma de headers (dict o list)
-        try:
-            packet.ensure_msg_id()
-        except Exception:
-            pass
+        packet.ensure_msg_id()
 
         # ===== HELLO =====
         # Solo refresca estado de vecino, NO se retransmite.
         if packet.type == "hello":
-            now = time.time()
             sender = packet.from_addr  # quien dijo "hello"
-            with self._lock:
-                nb_id = None
 
-                # 1) Preferimos el vecino por el canal si viene seteado
-                if from_neighbor and from_neighbor != "unknown":
-                    nb_id = from_neighbor
-
-                # 2) Si no, usamos el "from" del paquete cuando es un vecino conocido
-                if nb_id is None and sender in self.neighbors:
-                    nb_id = sender
+            # 1) Preferimos el vecino por el canal si viene seteado
+            # 2) Si no, usamos el "from" del paquete cuando es un vecino conocido
+            if from_neighbor and from_neighbor != "unknown":
+                nb_id = from_neighbor
+            elif sender in self.neighbors:
+                nb_id = sender
+            else:
+                return None
 
-                if nb_id is not None:
-                    st = self.neighbor_states.get(nb_id, {"cost": int(self.neighbors.get(nb_id, {}).get("cost", 1))})
-                    st["last_seen"] = now
-                    st["alive"] = True
-                    # asegura costo (por si no estaba)
-                    st["cost"] = int(self.neighbors.get(nb_id, {}).get("cost", st.get("cost", 1)))
-                    self.neighbor_states[nb_id] = st
-                    self.neighbors[nb_id] = {"cost": st["cost"]}
+            # Camino rápido sin lock: vecino conocido y vivo -> solo refresca last_seen
+            # (asignar un atributo es atómico; el SPF solo lee alive/cost)
+            now = time.monotonic()
+            states = self.neighbor_states
+            st = states.get(nb_id)
+            if st is not None and st.alive:
+                st.last_seen = now
+                self.topology_changed = True
+                return None
 
-                    # marca cambio y, opcionalmente, recalcula rápido
-                    self.topology_changed = True
-                    # self.calculate_routes()  # <- si quieres convergencia aún más ágil
+            with self._lock:
+                st = states.get(nb_id)
+                if st is None:
+                    # vecino nuevo: costo configurado (si lo hay) y alta en ambas tablas
+                    nb_id = sys.intern(nb_id)
+                    neighbors = self.neighbors
+                    nb = neighbors.get(nb_id)
+                    st = states[nb_id] = NeighborState(nb["cost"] if nb else 1)
+                    neighbors[nb_id] = {"cost": st.cost}
+                st.last_seen = now
+                st.alive = True
+                self._alive_neighbors[nb_id] = st.cost
+                self._topo_version += 1
+                self._refresh_edge(self.router_id, nb_id)
+
+                # marca cambio y, opcionalmente, recalcula rápido
+                self.topology_changed = True
+                # self._schedule_spf()  # <- si quieres convergencia aún más ágil
 
             return None  # hello no se reenvía
 
@@ -131,7 +219,7 @@ class LinkStateRouting(RoutingAlgorithm):
 
             # 2) Parse payload y anti-spoof
             try:
-                data = json.loads(packet.payload)
+                data = json_loads(packet.payload)
             except Exception:
                 return None
 
@@ -140,40 +228,50 @@ class LinkStateRouting(RoutingAlgorithm):
                 # Evita que alguien "falsifique" el origin dentro del payload
                 return None
 
-            origin = packet.from_addr
+            origin = sys.intern(packet.from_addr)
             seq = int(data.get("seq", 0))
             neighs = data.get("neighbors", {})
+            if not isinstance(neighs, dict):
+                return None
 
             # 3) Dedupe y actualización de LSDB
-            key = (origin, seq)
             with self._lock:
-                # duplicado exacto
-                if key in self.lsa_seen:
+                # duplicada u obsoleta
+                if seq <= self.max_seq.get(origin, -1):
                     return None
-                if len(self.lsa_fifo) >= self.lsa_capacity:
-                    old = self.lsa_fifo.popleft()
-                    self.lsa_seen.discard(old)
-                self.lsa_fifo.append(key)
-                self.lsa_seen.add(key)
-
-                # obsoleta
+                self.max_seq[origin] = seq
                 current = self.link_state_db.get(origin)
-                if current and seq <= int(current.get("seq", -1)):
-                    return None
 
                 # acepta y almacena
-                self.link_state_db[origin] = {
-                    "seq": seq,
-                    "neighbors": {str(k): int(v) for k, v in neighs.items()},
-                    "last_received": time.time()
-                }
+                # caso común: el JSON ya trae str -> int y no hace falta convertir para comparar
+                if not all(type(v) is int for v in neighs.values()):
+                    neighs = {k: int(v) for k, v in neighs.items()}
+                now = time.monotonic()
+                heapq.heappush(self._lsdb_expiry, (now + self.LSA_MAX_AGE, origin, seq))
+
+                # LSA de refresco (mismos vecinos/costos): la topología no cambió, no hay SPF;
+                # se actualiza la entrada existente en sitio (sin nuevo dict ni LSDBEntry)
+                if current is not None and current.neighbors == neighs:
+                    current.seq = seq
+                    current.last_received = now
+                    return "flood_lsa"
+
+                # topología nueva: interna los ids (hash cacheado, comparación por identidad en el SPF)
+                new_neighs = {sys.intern(k): v for k, v in neighs.items()}
+                self.link_state_db[origin] = LSDBEntry(seq, new_neighs, now)
+
+                self._topo_version += 1
+                old_neighs = current.neighbors if current is not None else {}
+                for nb in old_neighs.keys() | new_neighs.keys():
+                    self._refresh_edge(origin, nb)
                 # actualiza universo de routers
-                self.area_routers.update(
-                    [origin, *self.link_state_db[origin]["neighbors"].keys(), self.router_id]
-                )
+                # (set.update sobre el dict recorre sus claves en C, sin lista intermedia)
+                area = self.area_routers
+                area.add(origin)
+                area.update(new_neighs)
 
-                # recalcula rutas
-                self.calculateRoutes()
+                # recalcula rutas (diferido)
+                self._schedule_spf()
 
             # 4) Solicita flood controlado (router hará TTL-- y excluirá al emisor)
             return "flood_lsa"
@@ -191,14 +289,15 @@ class LinkStateRouting(RoutingAlgorithm):
     # ===== Emisión periódica de HELLO / INFO (router.py consulta estos) =====
 
     def should_send_hello(self) -> bool:
-        return (time.time() - self.last_hello_time) >= self.HELLO_INTERVAL
+        return time.monotonic() >= self.next_hello_due_at
 
     def create_hello_packet(self) -> Packet:
         """
         Crea HELLO (no se retransmite). Se usa para presencia/refresh de vecinos.
         """
-        self.last_hello_time = time.time()
-        headers = {"msg_id": uuid.uuid4().hex, "ts": self.last_hello_time, "path": []}
+        self.last_hello_time = time.monotonic()
+        self.next_hello_due_at = self.last_hello_time + self.HELLO_INTERVAL
+        headers = {"msg_id": new_msg_id(), "ts": time.time(), "path": []}
         return Packet(
             proto=self.get_name(),
             packet_type="hello",
@@ -209,52 +308,51 @@ class LinkStateRouting(RoutingAlgorithm):
             payload=""  # payload vacío según guía
         )
 
+    @property
+    def next_lsa_due_at(self) -> float:
+        """Cuándo toca la próxima LSA: antes si la topología cambió (LSA_MIN_INTERVAL < REFRESH)."""
+        return self._lsa_min_due_at if self.topology_changed else self._lsa_refresh_due_at
+
     def should_send_lsa(self) -> bool:
-        now = time.time()
-        if self.topology_changed and (now - self.last_lsa_time) >= self.LSA_MIN_INTERVAL:
-            return True
-        if (now - self.last_lsa_time) >= self.LSA_REFRESH_INTERVAL:
-            return True
-        return False
+        return time.monotonic() >= self.next_lsa_due_at
 
     def create_lsa_packet(self) -> Packet:
         """
         Emite mi LSA como paquete INFO (compatibilidad: receptor acepta "lsa" o "info").
         Pre-instala mi propio LSA en la LSDB y en el filtro de duplicados.
         """
+        now = time.monotonic()
         self.my_lsa_seq += 1
-        self.last_lsa_time = time.time()
+        self.last_lsa_time = now
+        self._lsa_min_due_at = now + self.LSA_MIN_INTERVAL
+        self._lsa_refresh_due_at = now + self.LSA_REFRESH_INTERVAL
         self.topology_changed = False
 
-        # Vecinos vivos en ventana de timeout
-        neighs: Dict[str, int] = {}
-        now = time.time()
+        # Vecinos vivos (índice mantenido por HELLO/update_neighbor/_check_neighbor_timeouts)
         with self._lock:
-            for nb, st in self.neighbor_states.items():
-                if st.get("alive", False) and (now - st.get("last_seen", 0)) < self.NEIGHBOR_TIMEOUT:
-                    neighs[nb] = int(st.get("cost", 1))
+            neighs: Dict[str, int] = dict(self._alive_neighbors)
 
             # Pre-instalo mi propio LSA en LSDB y dedupe
-            self.link_state_db[self.router_id] = {
-                "seq": self.my_lsa_seq,
-                "neighbors": dict(neighs),
-                "last_received": self.last_lsa_time,
-            }
-            key = (self.router_id, self.my_lsa_seq)
-            if len(self.lsa_fifo) >= self.lsa_capacity:
-                old = self.lsa_fifo.popleft()
-                self.lsa_seen.discard(old)
-            self.lsa_fifo.append(key)
-            self.lsa_seen.add(key)
-
-        self.calculateRoutes()
+            prev_own = self.link_state_db.get(self.router_id)
+            own_changed = prev_own is None or prev_own.neighbors != neighs
+            self.link_state_db[self.router_id] = LSDBEntry(self.my_lsa_seq, dict(neighs), now)
+            heapq.heappush(self._lsdb_expiry, (now + self.LSA_MAX_AGE, self.router_id, self.my_lsa_seq))
+            self.max_seq[self.router_id] = self.my_lsa_seq
+
+            if own_changed:
+                self._topo_version += 1
+                old_neighs = prev_own.neighbors if prev_own is not None else {}
+                for nb in old_neighs.keys() | neighs.keys():
+                    self._refresh_edge(self.router_id, nb)
+        if own_changed:
+            self._schedule_spf()
         payload = {
             "origin": self.router_id,
             "seq": self.my_lsa_seq,
             "neighbors": neighs,
-            "ts": self.last_lsa_time
+            "ts": time.time()
         }
-        headers = {"msg_id": uuid.uuid4().hex, "seq": self.my_lsa_seq, "path": []}
+        headers = {"msg_id": new_msg_id(), "seq": self.my_lsa_seq, "path": []}
 
         return Packet(
             proto=self.get_name(),
@@ -263,7 +361,7 @@ class LinkStateRouting(RoutingAlgorithm):
             to_addr="broadcast",
             ttl=16,
             headers=headers,
-            payload=json.dumps(payload)
+            payload=json_dumps_bytes(payload).decode("utf-8")
         )
 
     # ===== Mantenimientos periódicos =====
@@ -273,97 +371,165 @@ class LinkStateRouting(RoutingAlgorithm):
         Marca vecinos como vivos/muertos según NEIGHBOR_TIMEOUT.
         Si cambia algo, recalcula rutas y marca topología cambiada.
         """
-        now = time.time()
+        now = time.monotonic()
         changed = False
         with self._lock:
-            for nb, st in list(self.neighbor_states.items()):
-                last = st.get("last_seen", 0)
-                alive_now = (now - last) < self.NEIGHBOR_TIMEOUT
-                if alive_now != st.get("alive", False):
-                    st["alive"] = alive_now
-                    self.neighbor_states[nb] = st
+            for nb, st in self.neighbor_states.items():
+                alive_now = (now - st.last_seen) < self.NEIGHBOR_TIMEOUT
+                if alive_now != st.alive:
+                    st.alive = alive_now
+                    if alive_now:
+                        self._alive_neighbors[nb] = st.cost
+                    else:
+                        self._alive_neighbors.pop(nb, None)
+                    self._refresh_edge(self.router_id, nb)
                     changed = True
+            if changed:
+                self._topo_version += 1
         if changed:
             self.topology_changed = True
-            self.calculateRoutes()
+            self._schedule_spf()
 
     def _age_lsa_database(self):
         """
         Envejece/retira LSAs viejas (LSA_MAX_AGE). Si cambia algo, recalcula rutas.
         """
-        now = time.time()
+        now = time.monotonic()
         removed = False
         with self._lock:
-            for origin, entry in list(self.link_state_db.items()):
-                if (now - entry.get("last_received", 0)) >= self.LSA_MAX_AGE:
+            expiry = self._lsdb_expiry
+            while expiry and expiry[0][0] <= now:
+                _, origin, seq = heapq.heappop(expiry)
+                entry = self.link_state_db.get(origin)
+                # solo si la LSA vencida sigue siendo la vigente de ese origin
+                if entry is not None and entry.seq == seq:
                     del self.link_state_db[origin]
+                    for nb in entry.neighbors:
+                        self._refresh_edge(origin, nb)
+                    # olvida su seq: si el router reinició (seq desde 1) se vuelve a aceptar
+                    self.max_seq.pop(origin, None)
                     removed = True
+            if removed:
+                self._topo_version += 1
         if removed:
             self.topology_changed = True
-            self.calculateRoutes()
+            self._schedule_spf()
 
     # ===== SPF (Dijkstra) =====
 
+    def _schedule_spf(self):
+        """Pide un recálculo de rutas; el hilo SPF lo corre tras SPF_DEBOUNCE."""
+        self._spf_dirty.set()
+
+    def _spf_loop(self):
+        """
+        Hilo SPF: espera cambios, deja pasar SPF_DEBOUNCE para juntar las LSAs
+        que lleguen en ráfaga y corre un único calculateRoutes().
+        """
+        while not self._spf_stop.is_set():
+            self._spf_dirty.wait()
+            if self._spf_stop.wait(self.SPF_DEBOUNCE):
+                break
+            # limpiar antes de calcular: un cambio durante el SPF vuelve a marcar dirty
+            self._spf_dirty.clear()
+            try:
+                self.calculateRoutes()
+            except Exception:
+                # Mismo logger que el router (consola + archivo). calculateRoutes ya marcó
+                # esta versión como calculada: se invalida para que el próximo aviso recalcule.
+                logging.getLogger(f"Router-{self.router_id}").exception("Error en el cálculo SPF")
+                with self._lock:
+                    self._spf_version = -1
+
     def calculateRoutes(self):
         """
         Construye el grafo y corre SPF. Calcula el first-hop
         durante la relajación (más robusto que reconstruir al final).
         """
-        adj: Dict[str, Dict[str, int]] = defaultdict(dict)
-
         with self._lock:
-            # 1) Vecinos directos vivos
-            for nb, st in self.neighbor_states.items():
-                if st.get("alive", False):
-                    c = int(st.get("cost", 1))
-                    adj[self.router_id][nb] = c
-                    adj[nb][self.router_id] = c
-
-            # 2) LSAs aprendidas (ya envejecidas por _age_lsa_database)
-            for origin, entry in self.link_state_db.items():
-                for nb, c in entry.get("neighbors", {}).items():
-                    c = int(c)
-                    prev = adj[origin].get(nb, c)
-                    adj[origin][nb] = min(prev, c)
-                    prev2 = adj[nb].get(origin, c)
-                    adj[nb][origin] = min(prev2, c)
+            version = self._topo_version
+            if version == self._spf_version:
+                return  # grafo sin cambios: la routing_table publicada sigue vigente
+            self._spf_version = version
+
+            # snapshot del grafo incremental (copias en C, sin recorrer vecinos/LSDB)
+            adj: Dict[str, Dict[str, int]] = {u: dict(nbs) for u, nbs in self._adj.items()}
 
             self.area_routers = set(adj.keys())
             src = self.router_id
             if src not in adj:
-                self.routing_table.clear()
+                self.routing_table = {}
                 return
 
-            inf = float("inf")
-            dist: Dict[str, float] = {n: inf for n in adj.keys()}
-            first: Dict[str, Optional[str]] = {n: None for n in adj.keys()}
-            dist[src] = 0.0
-
-            unvisited = set(adj.keys())
-            while unvisited:
-                # desempate determinista
-                u = min(unvisited, key=lambda n: (dist.get(n, inf), n))
-                unvisited.remove(u)
-                if dist[u] == inf:
-                    break
-
-                for v in sorted(adj[u].keys()):
-                    if v not in unvisited:
-                        continue
-                    alt = dist[u] + adj[u][v]
-                    cand_first = v if u == src else first[u]
-
-                    if (alt < dist[v]) or (alt == dist[v] and self.preferFirstHop(cand_first, first[v])):
-                        dist[v] = alt
-                        first[v] = cand_first
-
-            new_table: Dict[str, str] = {}
-            for dst, fh in first.items():
-                if dst == src or fh is None or dist.get(dst, inf) == inf:
+        # El grafo se arma bajo el lock (snapshot); Dijkstra corre fuera de él.
+        inf = float("inf")
+        dist: Dict[str, float] = {n: inf for n in adj.keys()}
+        first: Dict[str, Optional[str]] = {n: None for n in adj.keys()}
+        dist[src] = 0.0
+
+        # Dijkstra con heap (lazy deletion): entradas viejas se descartan al sacarlas.
+        # (dist, nodo) desempata por nombre de forma determinista.
+        visited: Set[str] = set()
+        heap = [(0.0, src)]
+        heappush, heappop = heapq.heappush, heapq.heappop
+        while heap:
+            d, u = heappop(heap)
+            if u in visited:
+                continue
+            visited.add(u)
+
+            for v, w in adj[u].items():
+                if v in visited:
                     continue
-                new_table[dst] = fh  # next-hop definitivo
+                alt = d + w
+                cand_first = v if u == src else first[u]
+
+                if alt < dist[v]:
+                    dist[v] = alt
+                    first[v] = cand_first
+                    heappush(heap, (alt, v))
+                elif alt == dist[v] and self.preferFirstHop(cand_first, first[v]):
+                    # mismo costo: solo cambia el first-hop, la entrada en el heap sigue válida
+                    first[v] = cand_first
+
+        # first[v] solo se asigna al relajar (dist finita): None == inalcanzable
+        new_table = {dst: fh for dst, fh in first.items() if fh is not None and dst != src}
+        with self._lock:
+            # no pisar un resultado más nuevo publicado mientras calculábamos
+            if self._spf_version == version:
+                self.routing_table = new_table
 
-            self.routing_table = new_table
+    def _refresh_edge(self, a: str, b: str):
+        """
+        Recalcula el enlace a<->b en self._adj desde sus fuentes (llamar con el lock tomado):
+          - vecino directo vivo (si uno de los extremos soy yo)
+          - LSA de a que anuncia a b, y LSA de b que anuncia a a
+        Se queda el menor costo; si ninguna fuente lo anuncia, el enlace se borra.
+        """
+        if a == b:
+            return
+        best: Optional[int] = None
+        src = self.router_id
+        if a == src or b == src:
+            best = self._alive_neighbors.get(b if a == src else a)
+        for x, y in ((a, b), (b, a)):
+            entry = self.link_state_db.get(x)
+            if entry is not None:
+                c = entry.neighbors.get(y)
+                if c is not None and (best is None or c < best):
+                    best = c
+
+        adj = self._adj
+        if best is None:
+            for x, y in ((a, b), (b, a)):
+                nbs = adj.get(x)
+                if nbs is not None:
+                    nbs.pop(y, None)
+                    if not nbs:
+                        del adj[x]
+        else:
+            adj.setdefault(a, {})[b] = best
+            adj.setdefault(b, {})[a] = best
 
     def preferFirstHop(self, cand: Optional[str], cur: Optional[str]) -> bool:
         """
@@ -376,56 +542,29 @@ class LinkStateRouting(RoutingAlgorithm):
             return True
         if cand is None:
             return False
-        cand_nb = cand in self.neighbor_states and self.neighbor_states[cand].get("alive", False)
-        cur_nb  = cur  in self.neighbor_states and self.neighbor_states[cur].get("alive", False)
+        alive = self._alive_neighbors
+        cand_nb = cand in alive
+        cur_nb  = cur  in alive
         if cand_nb != cur_nb:
             return cand_nb
         return cand < cur
 
     # === Helpers ===
 
-    def firstHop(self, dst: str, prev: Dict[str, Optional[str]]) -> Optional[str]:
-        """
-        Obtiene el primer salto desde self.router_id hacia dst recorriendo 'prev'.
-        """
-        cur = dst
-        steps = 0
-        while prev.get(cur) is not None and prev[cur] != self.router_id:
-            cur = prev[cur]
-            steps += 1
-            if steps > 1024:  # protección
-                return None
-        if prev.get(cur) == self.router_id:
-            return cur
-        # vecino directo
-        if dst in self.neighbor_states and self.neighbor_states[dst].get("alive", False):
-            return dst
-        return None
-
     def handleHeadersPath(self, packet: Packet) -> bool:
         """
         Mantiene headers.path como ventana de 3 nodos y corta ciclos.
-        True  -> seguro continuar
-        False -> ciclo detectado o path inválido (drop)
+        True  -> seguro continuar (un path vacío es válido)
+        False -> ciclo detectado (drop)
         """
-        try:
-            path = packet.get_path()  # siempre list (internamente maneja dict/list)
-        except Exception:
-            path = []
+        path = packet.get_path_view()  # sin copia (dict o list); no se modifica
 
         # ciclo: si ya pasé por aquí, no reenvío
         if self.router_id in path:
             return False
 
-        # ventana de 3: quita primero si ya hay 3 y agrega mi id
-        new_path = list(path)
-        if len(new_path) >= 3:
-            new_path.pop(0)
+        # ventana de 3: últimos 2 + mi id (única lista nueva; set_path la adopta sin copiar)
+        new_path = path[-2:]
         new_path.append(self.router_id)
-
-        try:
-            packet.set_path(new_path)
-        except Exception:
-            return False
-
-        return True
\ No newline at end of file
+        packet.set_path(new_path)
+        return True
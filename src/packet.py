@@ -1,7 +1,46 @@
 # packet.py
+import itertools
 import json
+import struct
 import uuid
-from typing import Dict, List, Optional, Any, Union
+from typing import Dict, Iterable, List, Optional, Any, Union
+
+# Destination addresses that mean "every router" rather than a single node
+BROADCAST_ADDRS = frozenset({"broadcast", "multicast"})
+
+# Stream framing (socket mode): 4-byte big-endian body length, then the JSON body
+FRAME_HEADER = struct.Struct(">I")
+
+try:
+    import orjson  # optional: C-accelerated JSON, emits bytes directly
+except ImportError:
+    orjson = None
+
+
+def json_dumps_bytes(obj: Any) -> bytes:
+    """Serialize obj to compact UTF-8 JSON bytes (orjson when available)"""
+    if orjson is not None:
+        return orjson.dumps(obj)
+    return json.dumps(obj, separators=(",", ":")).encode("utf-8")
+
+
+def json_loads(data: Union[str, bytes]) -> Any:
+    """Parse JSON from str or bytes (orjson when available)"""
+    if orjson is not None:
+        return orjson.loads(data)
+    return json.loads(data)
+
+
+# msg_id generation: a random per-process prefix plus a counter. Unique across routers
+# and restarts without paying for uuid4() (an os.urandom read) on every packet.
+_MSG_ID_PREFIX = uuid.uuid4().hex[:12]
+_msg_id_counter = itertools.count()
+
+
+def new_msg_id() -> str:
+    """Return a fresh msg_id for duplicate filtering"""
+    return f"{_MSG_ID_PREFIX}-{next(_msg_id_counter):x}"
+
 
 class Packet:
     """
@@ -10,7 +49,14 @@ class Packet:
       - extended: headers = {"msg_id": "...", "path": ["A","B","C"], ...}
 
     Provides convenience methods so other modules don't need to branch.
+    Uses __slots__: one Packet is allocated per received packet, so skip the per-instance __dict__.
+
+    to_bytes() caches the serialized body so fan-out to N neighbors encodes once.
+    The mutators below (set_path, ensure_msg_id, decrement_ttl) drop the cache;
+    code that edits fields or headers directly after serializing must call invalidate().
     """
+    __slots__ = ("proto", "type", "from_addr", "to_addr", "ttl", "headers", "payload", "_wire")
+
     def __init__(
         self,
         proto: str,
@@ -33,6 +79,11 @@ class Packet:
         else:
             self.headers = headers
         self.payload = payload
+        self._wire: Optional[bytes] = None
+
+    def invalidate(self):
+        """Drop the cached wire bytes after an in-place change"""
+        self._wire = None
 
     # --- convenience helpers for header handling ----
     def _is_headers_dict(self) -> bool:
@@ -50,16 +101,20 @@ class Packet:
         If headers was a list, convert to dict preserving 'path'.
         Returns the msg_id.
         """
-        mid = self.get_msg_id()
-        if mid:
-            return mid
+        headers = self.headers
+        is_dict = isinstance(headers, dict)
+        if is_dict:
+            mid = headers.get("msg_id")
+            if mid:
+                return mid
 
-        new_id = uuid.uuid4().hex
-        if self._is_headers_dict():
-            self.headers["msg_id"] = new_id
+        new_id = new_msg_id()
+        self._wire = None
+        if is_dict:
+            headers["msg_id"] = new_id
         else:
-            # convert list -> dict preserving path
-            path = list(self.headers) if isinstance(self.headers, list) else []
+            # convert list -> dict preserving path (the old list is no longer referenced: reuse it)
+            path = headers if isinstance(headers, list) else []
             self.headers = {"path": path, "msg_id": new_id}
         return new_id
 
@@ -71,16 +126,30 @@ class Packet:
             return list(self.headers)
         return []
 
-    def set_path(self, path: List[str]):
-        """Set/update path preserving header shape (dict or list)"""
+    def get_path_view(self) -> List[str]:
+        """Return the path list stored in headers without copying; callers must not mutate it"""
+        if self._is_headers_dict():
+            path = self.headers.get("path")
+            return path if isinstance(path, list) else []
+        if isinstance(self.headers, list):
+            return self.headers
+        return []
+
+    def set_path(self, path: Iterable[str]):
+        """
+        Set/update path preserving header shape (dict or list); accepts any iterable (e.g. deque).
+        A list is stored as-is (the packet takes ownership); other iterables are copied.
+        """
+        self._wire = None
+        if type(path) is not list:
+            path = list(path)
         if self._is_headers_dict():
-            self.headers["path"] = list(path)
+            self.headers["path"] = path
         else:
-            self.headers = list(path)
+            self.headers = path
 
-    def to_json(self) -> str:
-        """Serialize to JSON string"""
-        return json.dumps({
+    def _to_dict(self) -> Dict[str, Any]:
+        return {
             "proto": self.proto,
             "type": self.type,
             "from": self.from_addr,
@@ -88,12 +157,28 @@ class Packet:
             "ttl": self.ttl,
             "headers": self.headers,
             "payload": self.payload
-        })
+        }
+
+    def to_bytes(self) -> bytes:
+        """Serialize to UTF-8 JSON bytes, ready for the wire (cached until the next mutation)"""
+        wire = self._wire
+        if wire is None:
+            wire = self._wire = json_dumps_bytes(self._to_dict())
+        return wire
+
+    def to_frame(self) -> bytes:
+        """Serialize to a length-prefixed frame for stream transports (TCP)"""
+        body = self.to_bytes()
+        return FRAME_HEADER.pack(len(body)) + body
+
+    def to_json(self) -> str:
+        """Serialize to JSON string"""
+        return self.to_bytes().decode("utf-8")
 
     @classmethod
-    def from_json(cls, json_str: str) -> "Packet":
-        """Construct Packet from JSON string"""
-        data = json.loads(json_str)
+    def from_json(cls, json_str: Union[str, bytes]) -> "Packet":
+        """Construct Packet from JSON string or bytes"""
+        data = json_loads(json_str)
         return cls(
             proto=data["proto"],
             packet_type=data["type"],
@@ -106,6 +191,7 @@ class Packet:
 
     def decrement_ttl(self) -> bool:
         """Decrement TTL by one. Return True if still > 0 after decrement."""
+        self._wire = None
         self.ttl -= 1
         return self.ttl > 0
 
@@ -1,45 +1,69 @@
+import os
+import sys
 import socket
+import selectors
+import signal
 import threading
 import logging
-import json
-import uuid
-from collections import deque
+import itertools
+import queue
+import types
+import sched
+import concurrent.futures
+import zlib
+from collections import OrderedDict, deque
 
 import asyncio
 import redis.asyncio as redis
 
-from datetime import datetime
 import time
 from src.algorithms.dijkstra import DijkstraAlgorithm
 from src.algorithms.flooding import FloodingAlgorithm
 from src.algorithms.lsr import LinkStateRouting
 from src.algorithms.base import RoutingAlgorithm
-from src.packet import Packet
+from src.packet import Packet, BROADCAST_ADDRS, FRAME_HEADER, json_loads, new_msg_id
 from src.utils import Colors
-from typing import Dict, List, Optional, Tuple, Any
+from typing import Dict, List, Mapping, Optional, Tuple, Any, Union
 from abc import ABC, abstractmethod
-from collections import deque
-import uuid
 
 
 class BaseRouter(ABC):
     """Base class for router implementations with common functionality"""
     
+    PACKET_LOG_SIZE = 100  # entries kept for the "logs" command
+    
+    # Periodic task cadences (seconds)
+    HELLO_PERIOD = 5
+    LSA_CHECK_PERIOD = 1       # should_send_lsa() is cheap; checking often sends triggered LSAs sooner
+    NEIGHBOR_CHECK_PERIOD = 5
+    LSA_AGING_PERIOD = 10
+    
     def __init__(self, router_id: str, algorithm: str):
         self.router_id = router_id
         self.topology = {}  # Full network topology from config
         self.neighbors = {}  # Direct neighbors from topology
         self.running = False
+        self._stop_event = threading.Event()  # set by stop(); start() waits on it
+        self.interactive = True  # command prompt on stdin (main.py --no-interactive turns it off)
+        self._stdin_buffer = b""
         
-        # Duplicate packet filtering
-        self._rx_seen_ids = set()
-        self._rx_seen_fifo = deque()
+        # Duplicate packet filtering (LRU of msg_ids, oldest first).
+        # Only one thread per transport receives (socket dispatch thread / Redis event loop), so no lock.
+        self._rx_seen: "OrderedDict[str, None]" = OrderedDict()
         self._rx_seen_capacity = 50000
-
-        self._rx_seen_lock = threading.Lock()
+        
+        # Recent packet activity for the "logs" command (oldest entries drop out)
+        self.packet_log = deque(maxlen=self.PACKET_LOG_SIZE)
         
         # Initialize routing algorithm
         self.routing_algorithm = self._create_routing_algorithm(algorithm)
+        self._algo_name = self.routing_algorithm.get_name()
+        
+        # Periodic work depends only on the algorithm, so pick it once
+        self._schedule_periodic = {
+            "lsr": self._schedule_lsr,
+            "dijkstra": self._schedule_dijkstra,
+        }.get(self._algo_name, self._schedule_flooding)
         
         # Logger for this router
         # Configure logger with console + file handlers
@@ -82,54 +106,68 @@ class BaseRouter(ABC):
         
         return algorithms[algorithm](self.router_id)
     
-    def load_topology(self, topo_file: str):
-        """Load network topology from JSON file"""
+    @staticmethod
+    def _load_config(source: Union[str, Dict], expected_type: str) -> Dict:
+        """Return a parsed config file; accepts a path or an already-parsed dict"""
+        if isinstance(source, dict):
+            data = source
+        else:
+            with open(source, 'rb') as f:
+                data = json_loads(f.read())
+        if data.get("type") != expected_type:
+            raise ValueError(f"Invalid {expected_type} file format")
+        return data
+    
+    def load_topology(self, topo_file: Union[str, Dict]):
+        """Load network topology from a JSON file path or parsed dict"""
         try:
-            with open(topo_file, 'r') as f:
-                topo_data = json.load(f)
-                if topo_data.get("type") != "topo":
-                    raise ValueError("Invalid topology file format")
-                
-                self.topology = topo_data["config"]
-                self.neighbors = {neighbor: {} for neighbor in self.topology.get(self.router_id, [])}
-                
-                self.logger.info(f"Loaded topology: {self.router_id} -> {list(self.neighbors.keys())}")
-                
-                # For Dijkstra algorithm, pass the full topology
-                if isinstance(self.routing_algorithm, DijkstraAlgorithm):
-                    self.routing_algorithm.set_topology(self.topology)
-                else:
-                    # Update routing algorithm with topology info for other algorithms
-                    for neighbor_id in self.neighbors:
-                        self.routing_algorithm.update_neighbor(neighbor_id, {"cost": 1})
+            topo_data = self._load_config(topo_file, "topo")
+            
+            self.topology = topo_data["config"]
+            self.neighbors = {neighbor: {} for neighbor in self.topology.get(self.router_id, [])}
+            
+            self.logger.info(f"Loaded topology: {self.router_id} -> {list(self.neighbors.keys())}")
+            
+            # Algorithms like Dijkstra get the full topology
+            if self.routing_algorithm.needs_full_topology:
+                self.routing_algorithm.set_topology(self.topology)
+            else:
+                # Update routing algorithm with topology info for other algorithms
+                for neighbor_id in self.neighbors:
+                    self.routing_algorithm.update_neighbor(neighbor_id, {"cost": 1})
                     
         except Exception as e:
             self.logger.error(f"Error loading topology: {e}")
             raise
     
     @abstractmethod
-    def load_node_addresses(self, names_file: str):
-        """Load node address mappings from JSON file (implementation specific)"""
+    def load_node_addresses(self, names_file: Union[str, Dict]):
+        """Load node address mappings from a JSON file path or parsed dict (implementation specific)"""
         pass
     
-    def _process_packet(self, packet: Packet, from_neighbor_id: Optional[str] = None):
-        """Process an incoming packet.
-
-        from_neighbor_id: optional neighbor id string (not a socket). When flooding we map it to a socket
-        to exclude the sender from retransmission.
-        """
-        # Duplicate detection
-        if self._mark_rx_seen(packet):
-            self.logger.debug(f"[DUPLICATE] Packet already seen, dropping")
-            return
-
+    def _process_batch(self, packets: List[Tuple[Packet, Optional[str]]]):
+        """Process (packet, from_neighbor_id) pairs received together; the single entry point for incoming packets.
+        Duplicate detection runs for the whole batch before any packet is routed. from_neighbor_id is a
+        neighbor id string (not a socket); when flooding it is passed on so the sender is excluded."""
+        duplicates = [self._remember_rx(self._rx_key(packet)) for packet, _ in packets]
+        for (packet, from_neighbor_id), duplicate in zip(packets, duplicates):
+            if duplicate:
+                self.logger.debug("[DUPLICATE] Packet %s already seen, dropping", packet.get_msg_id())
+                continue
+            try:
+                self._route_packet(packet, from_neighbor_id)
+            except Exception as e:
+                self.logger.error(f"Error processing packet from {from_neighbor_id or 'client'}: {e}")
+    
+    def _route_packet(self, packet: Packet, from_neighbor_id: Optional[str]):
+        """Act on a packet that passed duplicate detection"""
         # Allow routing algorithm to do protocol-specific processing if needed
         if packet.proto == "flooding":
             # flooding algorithm may keep its own state — nothing to do here by default
             pass
 
         # --- Broadcast / Multicast handling (multi-hop protocols like LSR may request forwarding) ---
-        if packet.to_addr in ["broadcast", "multicast"]:
+        if packet.to_addr in BROADCAST_ADDRS:
             neighbor_hint = from_neighbor_id if from_neighbor_id else "unknown"
             decision = self.routing_algorithm.process_packet(packet, neighbor_hint)
 
@@ -140,22 +178,19 @@ class BaseRouter(ABC):
                     return
                 decision = "flood"
 
-            # Map neighbor id -> socket to pass to flood helpers (they expect socket to exclude)
-            exclude_socket = self.active_connections.get(from_neighbor_id) if from_neighbor_id else None
-
             if decision == "flood":
                 # Decrement TTL for multi-hop broadcast forward
                 if not packet.decrement_ttl():
-                    self.logger.warning(f"[DROPPED] Broadcast TTL expired")
+                    self.logger.warning("[DROPPED] Broadcast TTL expired")
                     return
-                self._flood_packet(packet, exclude_socket)
+                self._flood_packet(packet, from_neighbor_id)
                 return
 
             if decision == "flood_lsa":
                 if not packet.decrement_ttl():
-                    self.logger.warning(f"[DROPPED] LSA TTL expired")
+                    self.logger.warning("[DROPPED] LSA TTL expired")
                     return
-                self._flood_packet_except_sender(packet, exclude_socket)
+                self._flood_packet_except_sender(packet, from_neighbor_id)
                 return
 
             # If decision was something else (e.g., a specific neighbor), let it fall through
@@ -164,7 +199,7 @@ class BaseRouter(ABC):
         # --- If packet is addressed to this router ---
         if packet.to_addr == self.router_id:
             if packet.type == "message":
-                self.logger.info(f"Message received: {packet.payload}")
+                self.logger.info("Message received: %s", packet.payload)
                 print(f"\n{Colors.GREEN}[MESSAGE FROM {packet.from_addr}]: {packet.payload}{Colors.ENDC}")
             elif packet.type == "echo":
                 # send echo reply
@@ -185,25 +220,23 @@ class BaseRouter(ABC):
         # --- Unicast forwarding ---
         # Decrement TTL now for unicast forwarding and drop if expired
         if not packet.decrement_ttl():
-            self.logger.warning(f"[DROPPED] Packet TTL expired")
+            self.logger.warning("[DROPPED] Packet TTL expired")
             return
 
         # Ask routing algorithm for next hop. Provide neighbor hint if available.
         neighbor_hint = from_neighbor_id if from_neighbor_id else "unknown"
         next_hop = self.routing_algorithm.process_packet(packet, neighbor_hint)
 
-        # If algorithm explicitly requested flooding for a unicast (rare), map neighbor id -> socket
-        exclude_socket = self.active_connections.get(from_neighbor_id) if from_neighbor_id else None
-
+        # If algorithm explicitly requested flooding for a unicast (rare), exclude the sender
         if next_hop == "flood":
-            self._flood_packet(packet, exclude_socket)
+            self._flood_packet(packet, from_neighbor_id)
         elif next_hop == "flood_lsa":
-            self._flood_packet_except_sender(packet, exclude_socket)
+            self._flood_packet_except_sender(packet, from_neighbor_id)
         elif next_hop:
             # next_hop is expected to be a neighbor id
             self._send_to_neighbor(packet, next_hop)
         else:
-            self.logger.warning(f"[DROPPED] No route to destination {packet.to_addr}")
+            self.logger.warning("[DROPPED] No route to destination %s", packet.to_addr)
 
     
     @abstractmethod
@@ -238,63 +271,74 @@ class BaseRouter(ABC):
         pass
     
     def _periodic_tasks(self):
-        """Handle periodic tasks like hello packets and LSAs"""
-        while self.running:
-            time.sleep(5)  # Check every 5 seconds
-            
+        """Run periodic tasks (hello packets, LSAs, maintenance), each at its own cadence, until stop()"""
+        scheduler = sched.scheduler(time.monotonic, lambda delay: self._wait_or_cancel(scheduler, delay))
+        self._schedule_periodic(scheduler)
+        scheduler.run()
+    
+    def _wait_or_cancel(self, scheduler: sched.scheduler, delay: float):
+        """Scheduler delay function: sleeps, but on stop() drops every pending task so run() returns"""
+        if self._stop_event.wait(delay):
+            for event in scheduler.queue:
+                scheduler.cancel(event)
+    
+    def _every(self, scheduler: sched.scheduler, period: float, task):
+        """Run task every `period` seconds (first run one period from now). scheduler is a
+        sched.scheduler, or anything with its enter() (RedisRouter uses event loop timers)"""
+        def run():
             try:
-                # Send hello packets for LSR
-                if isinstance(self.routing_algorithm, LinkStateRouting):
-                    if self.routing_algorithm.should_send_hello():
-                        hello_packet = self.routing_algorithm.create_hello_packet()
-                        self._broadcast_packet(hello_packet)
-                        self._log_packet("SENT", hello_packet, "multicast")
-                    
-                    # Send LSA if needed
-                    if self.routing_algorithm.should_send_lsa():
-                        lsa_packet = self.routing_algorithm.create_lsa_packet()
-                        self._broadcast_packet(lsa_packet)
-                        self._log_packet("SENT", lsa_packet, "broadcast")
-                    
-                    # Check for dead neighbors and age LSA database
-                    try:
-                        self.routing_algorithm._check_neighbor_timeouts()
-                    except Exception as e:
-                        self.logger.error(f"Error checking neighbor timeouts: {e}")
-                    
-                    try:
-                        self.routing_algorithm._age_lsa_database()
-                    except Exception as e:
-                        self.logger.error(f"Error aging LSA database: {e}")
-                
-                # For Dijkstra algorithm - no periodic packets needed
-                elif isinstance(self.routing_algorithm, DijkstraAlgorithm):
-                    pass
-                
-                # Send basic hello for flooding (neighbor discovery)
-                else:
-                    # REPLACE/ENSURE this block when creating hello packets for non-LSR algorithms
-                    hello_packet = Packet(
-                        proto=self.routing_algorithm.get_name(),   # keep configurable, not forcing "lsr"
-                        packet_type="hello",
-                        from_addr=self.router_id,
-                        to_addr="broadcast",
-                        ttl=5,
-                        headers=[self.router_id],                  # ensure this is present
-                        payload=""
-                    )
-                    self._broadcast_packet(hello_packet)
-
-
-
-                    
+                task()
             except Exception as e:
-                self.logger.error(f"Error in periodic tasks: {e}")
+                self.logger.error(f"Error in periodic task {task.__name__}: {e}")
                 import traceback
                 self.logger.error(f"Traceback: {traceback.format_exc()}")
+            if self.running:
+                scheduler.enter(period, 0, run)
+        scheduler.enter(period, 0, run)
     
-    def _handle_user_input(self):
-        """Handle user input for sending messages"""
+    def _schedule_lsr(self, scheduler: sched.scheduler):
+        """LSR: hello, LSA when due, neighbor timeouts and LSA aging"""
+        algorithm = self.routing_algorithm
+        self._every(scheduler, self.HELLO_PERIOD, self._send_lsr_hello)
+        self._every(scheduler, self.LSA_CHECK_PERIOD, self._send_lsr_lsa)
+        self._every(scheduler, self.NEIGHBOR_CHECK_PERIOD, algorithm._check_neighbor_timeouts)
+        self._every(scheduler, self.LSA_AGING_PERIOD, algorithm._age_lsa_database)
+    
+    def _send_lsr_hello(self):
+        if self.routing_algorithm.should_send_hello():
+            hello_packet = self.routing_algorithm.create_hello_packet()
+            self._broadcast_packet(hello_packet)
+            self._log_packet("SENT", hello_packet, "multicast")
+    
+    def _send_lsr_lsa(self):
+        if self.routing_algorithm.should_send_lsa():
+            lsa_packet = self.routing_algorithm.create_lsa_packet()
+            self._broadcast_packet(lsa_packet)
+            self._log_packet("SENT", lsa_packet, "broadcast")
+    
+    def _schedule_dijkstra(self, scheduler: sched.scheduler):
+        """Dijkstra: routes are static, no periodic packets needed"""
+        pass
+    
+    def _schedule_flooding(self, scheduler: sched.scheduler):
+        """Flooding: basic hello for neighbor discovery"""
+        self._every(scheduler, self.HELLO_PERIOD, self._tick_flooding)
+    
+    def _tick_flooding(self):
+        """Flooding: send one discovery hello"""
+        hello_packet = Packet(
+            proto=self._algo_name,
+            packet_type="hello",
+            from_addr=self.router_id,
+            to_addr="broadcast",
+            ttl=5,
+            headers=[self.router_id],
+            payload=""
+        )
+        self._broadcast_packet(hello_packet)
+    
+    def _print_commands(self):
+        """Print the available commands"""
         print(f"\n{Colors.BOLD}Router {self.router_id} ready.{Colors.ENDC} Commands:")
         print(f"  {Colors.CYAN}send <destination> <message>{Colors.ENDC} - Send message to destination")
         print(f"  {Colors.CYAN}echo <destination>{Colors.ENDC} - Send echo to destination")
@@ -306,110 +350,156 @@ class BaseRouter(ABC):
         print(f"  {Colors.CYAN}debug{Colors.ENDC} - Show routing algorithm state")
         print(f"  {Colors.CYAN}lsr{Colors.ENDC} - Show detailed LSR state (LSR only)")
         print(f"  {Colors.CYAN}quit{Colors.ENDC} - Exit router")
-        
+    
+    def _prompt(self):
+        """Show the command prompt (without a newline, like input())"""
+        print(f"\n{Colors.BOLD}{self.router_id}>{Colors.ENDC} ", end="", flush=True)
+    
+    def _start_user_input(self, loop: asyncio.AbstractEventLoop):
+        """Serve commands from stdin: through the event loop when it can watch stdin, else in a thread"""
+        if not self.interactive:
+            return
+        try:
+            loop.add_reader(sys.stdin.fileno(), self._on_stdin, loop)
+        except (NotImplementedError, ValueError, OSError, AttributeError):
+            # e.g. Windows or no real stdin: keep the blocking input() thread
+            input_thread = threading.Thread(target=self._handle_user_input)
+            input_thread.daemon = True
+            input_thread.start()
+            return
+        self._print_commands()
+        self._prompt()
+    
+    def _on_stdin(self, loop: asyncio.AbstractEventLoop):
+        """Event loop callback: stdin is readable, run every complete line"""
+        fd = sys.stdin.fileno()
+        data = os.read(fd, 4096)
+        if not data:
+            loop.remove_reader(fd)  # EOF: headless from here on
+            return
+        *lines, self._stdin_buffer = (self._stdin_buffer + data).split(b"\n")
+        for line in lines:
+            self._run_command(line.decode("utf-8", "replace").strip().split())
+            if not self.running:
+                loop.remove_reader(fd)
+                return
+        self._prompt()
+    
+    def _handle_user_input(self):
+        """Handle user input for sending messages (blocking input() loop, run in its own thread)"""
+        self._print_commands()
         while self.running:
             try:
                 command = input(f"\n{Colors.BOLD}{self.router_id}>{Colors.ENDC} ").strip().split()
-                if not command:
-                    continue
-                
-                if command[0] == "send" and len(command) >= 3:
-                    destination = command[1]
-                    message = " ".join(command[2:])
-                    packet = Packet(
-                        proto=self.routing_algorithm.get_name(),
-                        packet_type="message",
-                        from_addr=self.router_id,
-                        to_addr=destination,
-                        payload=message
-                    )
-                    try:
-                        self._forward_packet(packet)
-                        self._log_packet("SENT", packet)
-                    except Exception as e:
-                        print(f"{Colors.RED}Error sending packet: {e}{Colors.ENDC}")
-                
-                elif command[0] == "echo" and len(command) >= 2:
-                    destination = command[1]
-                    packet = Packet(
-                        proto=self.routing_algorithm.get_name(),
-                        packet_type="echo",
-                        from_addr=self.router_id,
-                        to_addr=destination,
-                        payload="Echo request"
-                    )
-                    try:
-                        self._forward_packet(packet)
-                        self._log_packet("SENT", packet)
-                    except Exception as e:
-                        print(f"{Colors.RED}Error sending echo: {e}{Colors.ENDC}")
-                
-                elif command[0] == "neighbors":
-                    self._show_neighbors()
-                
-                elif command[0] == "routes":
-                    print(f"{Colors.BOLD}Routing table:{Colors.ENDC}")
-                    for dest, next_hop in self.routing_algorithm.routing_table.items():
-                        print(f"  {Colors.YELLOW}{dest}{Colors.ENDC} -> {Colors.CYAN}{next_hop}{Colors.ENDC}")
-                
-                elif command[0] == "topology":
-                    print(f"{Colors.BOLD}Network topology:{Colors.ENDC}")
-                    for node, neighbors in self.topology.items():
-                        status = f"{Colors.GREEN}(this node){Colors.ENDC}" if node == self.router_id else ""
-                        print(f"  {Colors.YELLOW}{node}{Colors.ENDC}{status}: {neighbors}")
-                
-                elif command[0] == "logs":
-                    print(f"{Colors.BOLD}Recent packet logs:{Colors.ENDC}")
-                    for log_entry in self.packet_log[-10:]:
-                        print(f"  {log_entry}")
-                
-                elif command[0] == "path" and len(command) >= 2:
-                    destination = command[1]
-                    if isinstance(self.routing_algorithm, DijkstraAlgorithm):
-                        path = self.routing_algorithm.get_full_path(destination)
-                        if path:
-                            path_str = " → ".join(path)
-                            print(f"Path to {Colors.YELLOW}{destination}{Colors.ENDC}: {Colors.CYAN}{path_str}{Colors.ENDC}")
-                        else:
-                            print(f"No path to {Colors.YELLOW}{destination}{Colors.ENDC}")
-                    else:
-                        print("Path command only available for Dijkstra algorithm")
-                
-                elif command[0] == "debug":
-                    self._show_debug_info()
-                
-                elif command[0] == "lsr" and isinstance(self.routing_algorithm, LinkStateRouting):
-                    print(f"{Colors.BOLD}LSR Detailed Debug:{Colors.ENDC}")
-                    print(f"  Neighbor States:")
-                    for nb_id, state in self.routing_algorithm.neighbor_states.items():
-                        last_seen = state.get('last_seen', 0)
-                        alive = state.get('alive', False)
-                        cost = state.get('cost', 1)
-                        print(f"    {Colors.YELLOW}{nb_id}{Colors.ENDC}: alive={alive}, cost={cost}, last_seen={last_seen}")
-                    
-                    print(f"  LSA Database:")
-                    for origin, lsa in self.routing_algorithm.link_state_db.items():
-                        seq = lsa.get('seq', 0)
-                        neighbors = lsa.get('neighbors', {})
-                        print(f"    {Colors.CYAN}{origin}{Colors.ENDC}: seq={seq}, neighbors={neighbors}")
-                    
-                    print(f"  Area Routers: {list(self.routing_algorithm.area_routers)}")
-                    print(f"  My LSA Sequence: {self.routing_algorithm.my_lsa_seq}")
-                
-                elif command[0] == "quit":
-                    self.stop()
-                    break
-                
-                else:
-                    print(f"{Colors.RED}Unknown command{Colors.ENDC}")
-            
+            except EOFError:
+                break  # stdin closed: keep routing without a prompt
             except KeyboardInterrupt:
                 self.stop()
                 break
+            self._run_command(command)
+    
+    def _run_command(self, command: List[str]):
+        """Run one parsed command line"""
+        if not command:
+            return
+        try:
+            self._handle_command(command)
+        except Exception as e:
+            print(f"{Colors.RED}Error: {e}{Colors.ENDC}")
+            import traceback
+            self.logger.error(f"User input error: {traceback.format_exc()}")
+    
+    def _handle_command(self, command: List[str]):
+        """Execute a command (send, echo, inspect, quit)"""
+        if command[0] == "send" and len(command) >= 3:
+            destination = command[1]
+            message = " ".join(command[2:])
+            packet = Packet(
+                proto=self.routing_algorithm.get_name(),
+                packet_type="message",
+                from_addr=self.router_id,
+                to_addr=destination,
+                payload=message
+            )
+            try:
+                self._forward_packet(packet)
+                self._log_packet("SENT", packet)
             except Exception as e:
-                print(f"{Colors.RED}Error: {e}{Colors.ENDC}")
-                import traceback
-                self.logger.error(f"User input error: {traceback.format_exc()}")
+                print(f"{Colors.RED}Error sending packet: {e}{Colors.ENDC}")
+        
+        elif command[0] == "echo" and len(command) >= 2:
+            destination = command[1]
+            packet = Packet(
+                proto=self.routing_algorithm.get_name(),
+                packet_type="echo",
+                from_addr=self.router_id,
+                to_addr=destination,
+                payload="Echo request"
+            )
+            try:
+                self._forward_packet(packet)
+                self._log_packet("SENT", packet)
+            except Exception as e:
+                print(f"{Colors.RED}Error sending echo: {e}{Colors.ENDC}")
+        
+        elif command[0] == "neighbors":
+            self._show_neighbors()
+        
+        elif command[0] == "routes":
+            print(f"{Colors.BOLD}Routing table:{Colors.ENDC}")
+            for dest, next_hop in self.routing_algorithm.routing_table.items():
+                print(f"  {Colors.YELLOW}{dest}{Colors.ENDC} -> {Colors.CYAN}{next_hop}{Colors.ENDC}")
+        
+        elif command[0] == "topology":
+            print(f"{Colors.BOLD}Network topology:{Colors.ENDC}")
+            for node, neighbors in self.topology.items():
+                status = f"{Colors.GREEN}(this node){Colors.ENDC}" if node == self.router_id else ""
+                print(f"  {Colors.YELLOW}{node}{Colors.ENDC}{status}: {neighbors}")
+        
+        elif command[0] == "logs":
+            print(f"{Colors.BOLD}Recent packet logs:{Colors.ENDC}")
+            for log_entry in itertools.islice(self.packet_log, max(0, len(self.packet_log) - 10), None):
+                print(f"  {log_entry}")
+        
+        elif command[0] == "path" and len(command) >= 2:
+            destination = command[1]
+            if isinstance(self.routing_algorithm, DijkstraAlgorithm):
+                path = self.routing_algorithm.get_full_path(destination)
+                if path:
+                    path_str = " → ".join(path)
+                    print(f"Path to {Colors.YELLOW}{destination}{Colors.ENDC}: {Colors.CYAN}{path_str}{Colors.ENDC}")
+                else:
+                    print(f"No path to {Colors.YELLOW}{destination}{Colors.ENDC}")
+            else:
+                print("Path command only available for Dijkstra algorithm")
+        
+        elif command[0] == "debug":
+            self._show_debug_info()
+        
+        elif command[0] == "lsr" and isinstance(self.routing_algorithm, LinkStateRouting):
+            print(f"{Colors.BOLD}LSR Detailed Debug:{Colors.ENDC}")
+            print(f"  Neighbor States:")
+            now = time.monotonic()
+            for nb_id, state in self.routing_algorithm.neighbor_states.items():
+                last_seen = now - state.last_seen
+                alive = state.alive
+                cost = state.cost
+                print(f"    {Colors.YELLOW}{nb_id}{Colors.ENDC}: alive={alive}, cost={cost}, last_seen={last_seen:.1f}s ago")
+            
+            print(f"  LSA Database:")
+            for origin, lsa in self.routing_algorithm.link_state_db.items():
+                seq = lsa.seq
+                neighbors = lsa.neighbors
+                print(f"    {Colors.CYAN}{origin}{Colors.ENDC}: seq={seq}, neighbors={neighbors}")
+            
+            print(f"  Area Routers: {list(self.routing_algorithm.area_routers)}")
+            print(f"  My LSA Sequence: {self.routing_algorithm.my_lsa_seq}")
+        
+        elif command[0] == "quit":
+            self.stop()
+        
+        else:
+            print(f"{Colors.RED}Unknown command{Colors.ENDC}")
     
     @abstractmethod
     def _show_neighbors(self):
@@ -423,71 +513,43 @@ class BaseRouter(ABC):
         print(f"  Routing Table: {Colors.CYAN}{dict(self.routing_algorithm.routing_table)}{Colors.ENDC}")
         print(f"  Neighbors: {Colors.CYAN}{list(self.routing_algorithm.neighbors.keys())}{Colors.ENDC}")
         
-        if isinstance(self.routing_algorithm, DijkstraAlgorithm):
-            print(f"  Topology: {Colors.MAGENTA}{self.routing_algorithm.topology}{Colors.ENDC}")
-        elif isinstance(self.routing_algorithm, LinkStateRouting):
-            print(f"  LSA Database: {Colors.MAGENTA}{list(self.routing_algorithm.link_state_db.keys())}{Colors.ENDC}")
-            print(f"  Area Routers: {Colors.MAGENTA}{list(self.routing_algorithm.area_routers)}{Colors.ENDC}")
-            print(f"  Neighbor States: {Colors.MAGENTA}{list(self.routing_algorithm.neighbor_states.keys())}{Colors.ENDC}")
+        for label, value in self.routing_algorithm.debug_fields():
+            print(f"  {label}: {Colors.MAGENTA}{value}{Colors.ENDC}")
     
     def _log_packet(self, action: str, packet: Packet, neighbor: str = None):
-        """Log packet activity"""
-        timestamp = datetime.now().strftime("%H:%M:%S")
+        """Log packet activity (also kept for the "logs" command)"""
         neighbor_info = f" via {neighbor}" if neighbor else ""
-        mid = None
-        try:
-            mid = getattr(packet, "headers", {}).get("msg_id")
-        except Exception:
-            mid = None
+        mid = packet.get_msg_id()
         mid_info = f" [id={mid}]" if mid else ""
-        log_entry = f"{timestamp} [{action}]{neighbor_info} {packet.type}{mid_info} from {packet.from_addr} to {packet.to_addr}"
+        log_entry = f"{time.strftime('%H:%M:%S')} [{action}]{neighbor_info} {packet.type}{mid_info} from {packet.from_addr} to {packet.to_addr}"
         
         self.packet_log.append(log_entry)
         self.logger.info(log_entry)
-        
-        if len(self.packet_log) > 100:
-            self.packet_log = self.packet_log[-100:]
     
-    @staticmethod
-    def _ensure_msg_id(self, packet):
+    def _ensure_msg_id(self, packet: Packet) -> str:
         """
         Ensure a stable unique id in packet.headers['msg_id'] for duplicate filtering.
         Delegates to Packet.ensure_msg_id() so we don't clobber flooding path lists.
         """
-        try:
-            packet.ensure_msg_id()
-        except Exception:
-            # last-resort fallback (shouldn't be necessary with new Packet)
-            if not getattr(packet, "headers", None) or not isinstance(packet.headers, dict):
-                packet.headers = {"msg_id": uuid.uuid4().hex, "path": packet.get_path() if hasattr(packet, "get_path") else []}
-            elif "msg_id" not in packet.headers:
-                packet.headers["msg_id"] = uuid.uuid4().hex
+        return packet.ensure_msg_id()
 
     
-    def _mark_rx_seen(self, packet) -> bool:
-        """Returns True if packet.headers['msg_id'] was already seen (duplicate).
-        Maintains a simple LRU (set + deque). Thread-safe using _rx_seen_lock.
-        """
-        try:
-            # Try packet.get_msg_id() helper (Packet class). Fallback to dict lookup.
-            mid = packet.get_msg_id() if hasattr(packet, "get_msg_id") else None
-        except Exception:
-            mid = None
-
-        if not mid:
-            # If there's no msg_id we can't dedupe; treat as unseen (could also generate one)
+    def _rx_key(self, packet) -> Optional[str]:
+        """Dedup key for a packet (its msg_id), or None when it carries none (cannot be deduplicated)"""
+        return packet.get_msg_id() or None
+    
+    def _remember_rx(self, key: Optional[str]) -> bool:
+        """Record a msg_id in the LRU; True if it was already there (exact, no false positives)"""
+        if key is None:
             return False
-
-        with self._rx_seen_lock:
-            if mid in self._rx_seen_ids:
-                return True
-            if len(self._rx_seen_fifo) >= self._rx_seen_capacity:
-                old = self._rx_seen_fifo.popleft()
-                self._rx_seen_ids.discard(old)
-            self._rx_seen_fifo.append(mid)
-            self._rx_seen_ids.add(mid)
+        seen = self._rx_seen
+        if key in seen:
+            seen.move_to_end(key)
+            return True
+        seen[key] = None
+        if len(seen) > self._rx_seen_capacity:
+            seen.popitem(last=False)
         return False
-
     
     @abstractmethod
     async def start(self):
@@ -499,45 +561,151 @@ class BaseRouter(ABC):
         """Stop the router (implementation specific)"""
         pass
 
+class _Connection:
+    """One TCP connection watched by the SocketRouter reactor"""
+    __slots__ = ("sock", "neighbor_id", "inbound", "buffer")
+    
+    def __init__(self, sock: socket.socket, neighbor_id: Optional[str], inbound: bool):
+        self.sock = sock
+        self.neighbor_id = neighbor_id  # known up front for outbound, learned from packets for inbound
+        self.inbound = inbound
+        self.buffer = bytearray()  # received bytes not yet forming a complete frame
+
+class _LoopScheduler:
+    """The sched.scheduler.enter() subset BaseRouter._every needs, backed by asyncio timers (RedisRouter)"""
+    __slots__ = ("loop", "handles")
+    
+    def __init__(self, loop: asyncio.AbstractEventLoop):
+        self.loop = loop
+        self.handles: set = set()
+    
+    def enter(self, delay: float, priority: int, action):
+        def fire():
+            self.handles.discard(handle)
+            action()
+        handle = self.loop.call_later(delay, fire)
+        self.handles.add(handle)
+    
+    def cancel_all(self):
+        for handle in self.handles:
+            handle.cancel()
+        self.handles.clear()
+
+class _Waker:
+    """Self-pipe (socketpair) that lets another thread interrupt a blocking selector.select()"""
+    __slots__ = ("reader", "writer")
+    
+    def __init__(self):
+        self.reader, self.writer = socket.socketpair()
+        self.reader.setblocking(False)
+        self.writer.setblocking(False)
+    
+    def wake(self):
+        try:
+            self.writer.send(b"\0")
+        except OSError:
+            pass  # buffer full (a wakeup is already pending) or closed on stop()
+    
+    def drain(self):
+        try:
+            while self.reader.recv(4096):
+                pass
+        except OSError:
+            pass
+    
+    def close(self):
+        self.reader.close()
+        self.writer.close()
+
 class SocketRouter(BaseRouter):
-    """Socket-based router implementation"""
+    """Socket-based router implementation (packets are length-prefixed frames, see Packet.to_frame).
+    All connections are read by a single selector reactor thread; packets are processed on a dispatch thread."""
+    
+    READ_BUFFER_SIZE = 65536
+    MAX_FRAME_SIZE = 1 << 20  # larger length prefixes mean a corrupt stream or an unframed peer
+    MAX_ACCEPT_THREADS = 4  # listening sockets sharing the port via SO_REUSEPORT
+    LISTEN_BACKLOG = 64
+    MAX_PENDING_FRAMES = 1000  # per neighbor; newer frames are dropped while a peer is this far behind
+    HELLO_MSG_ID_MARK = b"__MSGID__"
+    SOCKET_BUFFER_SIZE = 1 << 20  # SO_SNDBUF / SO_RCVBUF
+    CONNECT_TIMEOUT = 2
+    USE_SENDMSG = hasattr(socket.socket, "sendmsg")  # not available on Windows
+    MAX_IOV = 64  # frames per sendmsg call (well under IOV_MAX)
+    MAX_CONNECT_WORKERS = 16
+    RETRY_MIN_DELAY = 1    # first retry after a failed connect; doubles per further failure
+    RETRY_MAX_DELAY = 60
+    RETRY_IDLE_INTERVAL = 15  # re-check when every neighbor is connected
+    RETRY_STABLE_LINK = 30    # a link up at least this long clears the neighbor's failure count
     
     def __init__(self, router_id: str, host: str, port: int, algorithm: str):
         super().__init__(router_id, algorithm)
         self.host = host
         self.port = port
-        self.socket = None
+        self._listen_sockets: List[socket.socket] = []
         self.node_addresses = {}  # Node ID -> {host, port} mapping
-        self.active_connections = {}  # neighbor_id -> socket
+        # neighbor_id -> socket. Copy-on-write: connect/disconnect publish a new read-only
+        # mapping under _conn_lock, so readers use whatever snapshot they load without locking.
+        self.active_connections: Mapping[str, socket.socket] = types.MappingProxyType({})
+        self._conn_lock = threading.Lock()
+        self._flood_targets: Dict[Optional[str], Tuple[Tuple[str, socket.socket], ...]] = {}  # excluded ID -> targets
+        
+        # Outgoing frames a neighbor could not take yet, drained by the writer thread
+        self._send_queues: Dict[str, deque] = {}
+        self._send_selector = selectors.DefaultSelector()
+        self._writer_waker = _Waker()  # registered with data=None: interrupts the writer's select()
+        self._send_selector.register(self._writer_waker.reader, selectors.EVENT_READ, None)
+        self._send_lock = threading.Lock()
+        
+        # Incoming side: one reactor reads every connection, complete frames go to the dispatch thread
+        self._read_selector = selectors.DefaultSelector()
+        self._reactor_waker = _Waker()  # registered with data=None: interrupts the reactor's select()
+        self._read_selector.register(self._reactor_waker.reader, selectors.EVENT_READ, None)
+        self._inbox: "queue.SimpleQueue[Optional[Tuple[_Connection, List[bytes]]]]" = queue.SimpleQueue()
+        
+        self._hello_template: Optional[bytes] = None  # encoded flooding hello with a msg_id placeholder
+        
+        # Neighbor connects run concurrently, so unreachable peers don't serialize their timeouts
+        self._connect_pool = concurrent.futures.ThreadPoolExecutor(
+            max_workers=self.MAX_CONNECT_WORKERS, thread_name_prefix="connect"
+        )
+        # Reconnect backoff per unreachable neighbor; a disconnect wakes the retry thread at once
+        self._connect_failures: Dict[str, int] = {}
+        self._next_retry: Dict[str, float] = {}  # neighbor_id -> time.monotonic() deadline
+        self._connected_at: Dict[str, float] = {}  # neighbor_id -> when its current link came up
+        self._connecting: set = set()  # neighbor ids with a connect attempt in flight
+        self._retry_wakeup = threading.Event()
+        
+        # Linux: keep the reactor and its sockets' packet processing on one CPU (stable per router id)
+        self._cpu_id: Optional[int] = None
+        if hasattr(os, "sched_getaffinity"):
+            cpus = sorted(os.sched_getaffinity(0))
+            self._cpu_id = cpus[zlib.crc32(router_id.encode("utf-8")) % len(cpus)]
     
-    def load_node_addresses(self, names_file: str):
-        """Load node address mappings from JSON file"""
+    def load_node_addresses(self, names_file: Union[str, Dict]):
+        """Load node address mappings from a JSON file path or parsed dict"""
         try:
-            with open(names_file, 'r') as f:
-                names_data = json.load(f)
-                if names_data.get("type") != "names":
-                    raise ValueError("Invalid names file format")
-                
-                self.node_addresses = names_data["config"]
-                
-                # Update neighbor information with addresses
-                for neighbor_id in self.neighbors:
-                    if neighbor_id in self.node_addresses:
-                        addr_info = self.node_addresses[neighbor_id]
-                        self.neighbors[neighbor_id] = {
-                            "host": addr_info["host"],
-                            "port": addr_info["port"],
-                            "cost": 1  # Default cost
-                        }
-                        # Update routing algorithm with complete neighbor info
-                        self.routing_algorithm.update_neighbor(neighbor_id, self.neighbors[neighbor_id])
-                
-                self.logger.info(f"Loaded addresses for {len(self.node_addresses)} nodes")
+            names_data = self._load_config(names_file, "names")
+            
+            self.node_addresses = names_data["config"]
+            
+            # Update neighbor information with addresses
+            for neighbor_id in self.neighbors:
+                if neighbor_id in self.node_addresses:
+                    addr_info = self.node_addresses[neighbor_id]
+                    self.neighbors[neighbor_id] = {
+                        "host": addr_info["host"],
+                        "port": addr_info["port"],
+                        "cost": 1  # Default cost
+                    }
+                    # Update routing algorithm with complete neighbor info
+                    self.routing_algorithm.update_neighbor(neighbor_id, self.neighbors[neighbor_id])
+            
+            self.logger.info(f"Loaded addresses for {len(self.node_addresses)} nodes")
+            
+            # Trigger initial routing calculation for LSR and Dijkstra
+            if isinstance(self.routing_algorithm, (DijkstraAlgorithm, LinkStateRouting)):
+                print(f"🔧 Triggering initial routing calculation for {self.router_id}")
                 
-                # Trigger initial routing calculation for LSR and Dijkstra
-                if isinstance(self.routing_algorithm, (DijkstraAlgorithm, LinkStateRouting)):
-                    print(f"🔧 Triggering initial routing calculation for {self.router_id}")
-                    
         except Exception as e:
             self.logger.error(f"Error loading node addresses: {e}")
             raise
@@ -545,26 +713,36 @@ class SocketRouter(BaseRouter):
     async def start(self):
         """Start the socket router"""
         self.running = True
-        self.socket = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
-        self.socket.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
-        self.socket.bind((self.host, self.port))
-        self.socket.listen(10)
+        self._listen_sockets = self._create_listen_sockets()
         
         self.logger.info(f"Router {Colors.BOLD}{self.router_id}{Colors.ENDC} started on {self.host}:{self.port}")
         self.logger.info(f"Using routing algorithm: {Colors.BOLD}{self.routing_algorithm.get_name()}{Colors.ENDC}")
         
-        # Start listening thread
-        listen_thread = threading.Thread(target=self._listen_for_connections)
-        listen_thread.daemon = True
-        listen_thread.start()
+        # Start one accept thread per listening socket
+        for listen_socket in self._listen_sockets:
+            listen_thread = threading.Thread(target=self._listen_for_connections, args=(listen_socket,))
+            listen_thread.daemon = True
+            listen_thread.start()
+        
+        # Start the reactor (reads all connections) and the dispatch thread (processes packets)
+        reactor_thread = threading.Thread(target=self._reactor_loop)
+        reactor_thread.daemon = True
+        reactor_thread.start()
+        dispatch_thread = threading.Thread(target=self._dispatch_loop)
+        dispatch_thread.daemon = True
+        dispatch_thread.start()
+        
+        # Start the writer thread for backpressured neighbors
+        writer_thread = threading.Thread(target=self._writer_loop)
+        writer_thread.daemon = True
+        writer_thread.start()
         
-        # Start input thread for user commands
-        input_thread = threading.Thread(target=self._handle_user_input)
-        input_thread.daemon = True
-        input_thread.start()
+        # Serve user commands from stdin on the event loop
+        loop = asyncio.get_running_loop()
+        self._start_user_input(loop)
         
-        # Connect to neighbors (non-blocking, continues even if some fail)
-        self._connect_to_neighbors()
+        # Connect to neighbors (continues even if some fail); off the event loop, which serves stdin
+        await loop.run_in_executor(None, self._connect_to_neighbors)
         
         # Start periodic tasks thread
         periodic_thread = threading.Thread(target=self._periodic_tasks)
@@ -576,163 +754,427 @@ class SocketRouter(BaseRouter):
         retry_thread.daemon = True
         retry_thread.start()
         
-        # Keep main thread alive
-        while self.running:
-            time.sleep(1)
+        # Ctrl+C stops the router cleanly instead of interrupting the wait below
+        try:
+            loop.add_signal_handler(signal.SIGINT, self.stop)
+        except (NotImplementedError, RuntimeError):
+            pass  # e.g. Windows: fall back to KeyboardInterrupt handling in main.py
+        
+        # Block until stop() is called, without waking up periodically
+        try:
+            await loop.run_in_executor(None, self._stop_event.wait)
+        except asyncio.CancelledError:
+            self.stop()
+            raise
     
-    def _listen_for_connections(self):
-        """Listen for incoming connections"""
+    def _create_listen_sockets(self) -> List[socket.socket]:
+        """Bind the listening sockets. With SO_REUSEPORT the kernel spreads incoming
+        connections over several sockets (one accept thread each); without it a single socket is used."""
+        count = 1
+        if hasattr(socket, "SO_REUSEPORT"):
+            count = max(1, min(self.MAX_ACCEPT_THREADS, len(self.neighbors)))
+        
+        sockets = []
+        for _ in range(count):
+            listen_socket = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+            listen_socket.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+            if count > 1:
+                listen_socket.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEPORT, 1)
+            self._configure_buffers(listen_socket)  # inherited by accepted sockets
+            self._steer_to_cpu(listen_socket)
+            listen_socket.bind((self.host, self.port))
+            listen_socket.listen(self.LISTEN_BACKLOG)
+            sockets.append(listen_socket)
+        return sockets
+    
+    def _listen_for_connections(self, listen_socket: socket.socket):
+        """Listen for incoming connections on one listening socket"""
         while self.running:
             try:
-                client_socket, address = self.socket.accept()
+                client_socket, address = listen_socket.accept()
+                self._configure_socket(client_socket)
                 self.logger.info(f"Accepted connection from {address}")
                 
-                # Handle client in separate thread
-                client_thread = threading.Thread(
-                    target=self._handle_client, 
-                    args=(client_socket,)
-                )
-                client_thread.daemon = True
-                client_thread.start()
+                # The reactor reads it from now on
+                self._watch_connection(_Connection(client_socket, None, inbound=True))
             except Exception as e:
                 if self.running:
                     self.logger.error(f"Error accepting connection: {e}")
     
-    def _handle_client(self, client_socket: socket.socket):
-        """Handle incoming packets from a client"""
-        client_neighbor_id = None
+    @classmethod
+    def _configure_buffers(cls, sock: socket.socket):
+        """Enlarge kernel socket buffers; done before connect/listen so the TCP window scale covers them"""
+        sock.setsockopt(socket.SOL_SOCKET, socket.SO_SNDBUF, cls.SOCKET_BUFFER_SIZE)
+        sock.setsockopt(socket.SOL_SOCKET, socket.SO_RCVBUF, cls.SOCKET_BUFFER_SIZE)
+    
+    def _steer_to_cpu(self, sock: socket.socket):
+        """Ask the kernel to handle this socket's traffic on the reactor's CPU (Linux only)"""
+        if self._cpu_id is not None and hasattr(socket, "SO_INCOMING_CPU"):
+            sock.setsockopt(socket.SOL_SOCKET, socket.SO_INCOMING_CPU, self._cpu_id)
+    
+    def _configure_socket(self, sock: socket.socket):
+        """Tune a connected socket once: disable Nagle so small control packets go out immediately,
+        and make it non-blocking for the reactor / writer threads"""
+        sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+        if hasattr(socket, "TCP_QUICKACK"):  # Linux: ACK right away instead of delaying
+            sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_QUICKACK, 1)
+        self._steer_to_cpu(sock)
+        sock.setblocking(False)
+    
+    def _watch_connection(self, conn: _Connection):
+        """Hand a connected socket to the reactor"""
+        self._read_selector.register(conn.sock, selectors.EVENT_READ, conn)
+        self._reactor_waker.wake()  # not every selector picks up a registration made mid-select()
+    
+    def _reactor_loop(self):
+        """Read every connection from one thread; complete frames are queued for the dispatch thread"""
+        if self._cpu_id is not None:
+            os.sched_setaffinity(0, {self._cpu_id})  # this thread only
         try:
             while self.running:
-                data = client_socket.recv(4096)
-                if not data:
-                    break
-                
                 try:
-                    packet = Packet.from_json(data.decode('utf-8'))
-                    
-                    # Try to identify the neighbor by the packet's from_addr
-                    if packet.from_addr in self.neighbors:
-                        client_neighbor_id = packet.from_addr
-                    
-                    self._log_packet("RECEIVED", packet, client_neighbor_id)
-                    self._process_packet(packet, client_neighbor_id)
-                except Exception as e:
-                    self.logger.error(f"Error processing packet: {e}")
-        except Exception as e:
-            self.logger.error(f"Error handling client: {e}")
+                    events = self._read_selector.select()  # blocks until data or a wakeup
+                except (OSError, ValueError):
+                    continue  # a socket was closed while selecting
+                for key, _ in events:
+                    if key.data is None:
+                        self._reactor_waker.drain()
+                    else:
+                        self._on_readable(key.data)
         finally:
-            client_socket.close()
+            self._read_selector.close()
+            self._reactor_waker.close()
+    
+    def _on_readable(self, conn: _Connection):
+        """Drain what the socket has and split it into length-prefixed frames"""
+        try:
+            data = conn.sock.recv(self.READ_BUFFER_SIZE)
+        except BlockingIOError:
+            return
+        except OSError as e:
+            if self.running:
+                self.logger.warning(f"Lost connection to {conn.neighbor_id or 'client'}: {e}")
+            data = b""
+        if not data:
+            self._close_connection(conn)
+            return
+        
+        buf = conn.buffer
+        buf += data
+        header_size = FRAME_HEADER.size
+        frames = []
+        offset = 0
+        oversized = 0
+        while len(buf) - offset >= header_size:
+            (length,) = FRAME_HEADER.unpack_from(buf, offset)
+            if length > self.MAX_FRAME_SIZE:
+                oversized = length
+                break
+            end = offset + header_size + length
+            if end > len(buf):
+                break
+            frames.append(bytes(buf[offset + header_size:end]))
+            offset = end
+        if offset:
+            del buf[:offset]
+        if frames:
+            self._inbox.put((conn, frames))
+        if oversized:
+            self.logger.warning(
+                f"Closing connection to {conn.neighbor_id or 'client'}: frame length {oversized} "
+                f"exceeds {self.MAX_FRAME_SIZE} (corrupt stream or peer not using length-prefixed frames)"
+            )
+            self._close_connection(conn)
+    
+    def _close_connection(self, conn: _Connection):
+        """Stop watching a connection and forget it as a neighbor link"""
+        try:
+            self._read_selector.unregister(conn.sock)
+        except (KeyError, ValueError):
+            pass
+        neighbor_id = conn.neighbor_id
+        if not conn.inbound and self._unpublish_connection(neighbor_id, conn.sock):
+            self.logger.info(f"[DISCONNECTED] from neighbor {Colors.BOLD}{neighbor_id}{Colors.ENDC}")
+            self._drop_send_queue(neighbor_id, conn.sock)
+            # A link that had been stable is retried right away with a clean slate; one that
+            # dropped soon after connecting counts as a failure, so a flapping peer backs off
+            uptime = time.monotonic() - self._connected_at.pop(neighbor_id, 0.0)
+            if uptime >= self.RETRY_STABLE_LINK:
+                self._connect_failures.pop(neighbor_id, None)
+                self._next_retry.pop(neighbor_id, None)
+            else:
+                self._back_off(neighbor_id)
+            self._retry_wakeup.set()
+        conn.sock.close()
+    
+    def _dispatch_loop(self):
+        """Process received packets in arrival order, off the reactor thread"""
+        while True:
+            item = self._inbox.get()
+            if item is None:
+                break
+            conn, frames = item
+            batch = []
+            for data in frames:
+                packet = self._decode_frame(conn, data)
+                if packet is not None:
+                    batch.append((packet, conn.neighbor_id))
+            self._process_batch(batch)
+    
+    def _decode_frame(self, conn: _Connection, data: bytes) -> Optional[Packet]:
+        """Decode one received packet and note which neighbor it came from; None if malformed"""
+        try:
+            packet = Packet.from_json(data)
+            
+            if conn.inbound:
+                # Try to identify the neighbor by the packet's from_addr
+                if packet.from_addr in self.neighbors:
+                    conn.neighbor_id = packet.from_addr
+            
+            self._log_packet("RECEIVED", packet, conn.neighbor_id)
+            return packet
+        except Exception as e:
+            self.logger.error(f"Error processing packet from {conn.neighbor_id or 'client'}: {e}")
+            return None
+    
+    def _tick_flooding(self):
+        """Flooding hello: only the msg_id changes between ticks, so splice it into a cached encoding"""
+        if self._hello_template is None:
+            hello_packet = Packet(
+                proto=self._algo_name,
+                packet_type="hello",
+                from_addr=self.router_id,
+                to_addr="broadcast",
+                ttl=5,
+                headers={"path": [self.router_id], "msg_id": self.HELLO_MSG_ID_MARK.decode()},
+                payload=""
+            )
+            self._hello_template = hello_packet.to_bytes()
+        
+        body = self._hello_template.replace(self.HELLO_MSG_ID_MARK, new_msg_id().encode(), 1)
+        self._fanout(FRAME_HEADER.pack(len(body)) + body, None, "broadcasting")
     
     def _connect_to_neighbors(self):
-        """Connect to all configured neighbors (non-blocking)"""
+        """Connect to all configured neighbors that are not connected yet and whose retry backoff
+        has expired, in one concurrent wave (returns after at most about one connect timeout)"""
+        now = time.monotonic()
+        futures = []
         for neighbor_id, neighbor_info in self.neighbors.items():
-            if neighbor_id not in self.active_connections:
-                self._try_connect_neighbor(neighbor_id, neighbor_info)
+            if (neighbor_id in self.active_connections or neighbor_id in self._connecting
+                    or self._next_retry.get(neighbor_id, 0) > now):
+                continue
+            # Marked before submitting, cleared by _try_connect_neighbor: a connect still running when
+            # the wait below times out is not submitted a second time by the next wave
+            self._connecting.add(neighbor_id)
+            try:
+                futures.append(self._connect_pool.submit(self._try_connect_neighbor, neighbor_id, neighbor_info))
+            except RuntimeError:
+                # stop() shut the pool down between the caller's running check and this submit
+                self._connecting.discard(neighbor_id)
+                break
+        concurrent.futures.wait(futures, timeout=self.CONNECT_TIMEOUT + 1)
     
     def _try_connect_neighbor(self, neighbor_id: str, neighbor_info: Dict):
         """Try to connect to a specific neighbor"""
         try:
             if "host" not in neighbor_info or "port" not in neighbor_info:
                 self.logger.warning(f"Missing address info for neighbor {neighbor_id}")
+                self._back_off(neighbor_id)
                 return
                 
             neighbor_socket = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
-            neighbor_socket.settimeout(2)  # 2 second timeout
+            self._configure_buffers(neighbor_socket)
+            neighbor_socket.settimeout(self.CONNECT_TIMEOUT)
             neighbor_socket.connect((neighbor_info["host"], neighbor_info["port"]))
-            neighbor_socket.settimeout(None)  # Remove timeout after connection
+            self._configure_socket(neighbor_socket)
             
-            self.active_connections[neighbor_id] = neighbor_socket
+            self._connected_at[neighbor_id] = time.monotonic()
+            self._publish_connection(neighbor_id, neighbor_socket)
+            self._next_retry.pop(neighbor_id, None)
             self.logger.info(f"[CONNECTED] to neighbor {Colors.BOLD}{neighbor_id}{Colors.ENDC}")
             
-            # For LSR, explicitly notify the routing algorithm about the connection
-            if isinstance(self.routing_algorithm, LinkStateRouting):
-                self.logger.info(f"LSR: Notifying algorithm about connected neighbor {neighbor_id}")
-                self.routing_algorithm.update_neighbor(neighbor_id, {"cost": 1})
+            # Let the routing algorithm know the link is up (LSR marks the neighbor alive)
+            self.routing_algorithm.on_neighbor_connected(neighbor_id)
             
-            # Start a thread to handle this neighbor connection
-            neighbor_thread = threading.Thread(
-                target=self._handle_neighbor_connection,
-                args=(neighbor_socket, neighbor_id)
-            )
-            neighbor_thread.daemon = True
-            neighbor_thread.start()
+            # The reactor reads this neighbor from now on
+            self._watch_connection(_Connection(neighbor_socket, neighbor_id, inbound=False))
             
         except Exception as e:
-            self.logger.warning(f"Could not connect to neighbor {neighbor_id}: {e}")
+            delay = self._back_off(neighbor_id)
+            self.logger.warning(f"Could not connect to neighbor {neighbor_id}: {e} (retry in {delay}s)")
+        finally:
+            self._connecting.discard(neighbor_id)
     
-    def _handle_neighbor_connection(self, neighbor_socket: socket.socket, neighbor_id: str):
-        """Handle ongoing communication with a neighbor"""
+    def _back_off(self, neighbor_id: str) -> float:
+        """Record a failed connect and schedule the next attempt (exponential backoff); returns the delay"""
+        failures = self._connect_failures.get(neighbor_id, 0) + 1
+        self._connect_failures[neighbor_id] = failures
+        delay = min(self.RETRY_MAX_DELAY, self.RETRY_MIN_DELAY * 2 ** (failures - 1))
+        self._next_retry[neighbor_id] = time.monotonic() + delay
+        self._retry_wakeup.set()  # the retry thread may be sleeping past this new deadline
+        return delay
+    
+    def _retry_connections(self):
+        """Retry failed connections when their backoff expires, or right after a disconnect"""
+        while self.running:
+            now = time.monotonic()
+            deadlines = [
+                self._next_retry.get(neighbor_id, now)
+                for neighbor_id in list(self.neighbors)
+                if neighbor_id not in self.active_connections and neighbor_id not in self._connecting
+            ]
+            timeout = max(0.0, min(deadlines) - now) if deadlines else self.RETRY_IDLE_INTERVAL
+            self._retry_wakeup.wait(timeout)
+            self._retry_wakeup.clear()
+            if self.running:
+                self._connect_to_neighbors()
+    
+    def _enqueue_send(self, neighbor_id: str, neighbor_socket: socket.socket, frame: bytes):
+        """Send a frame without blocking on a slow neighbor (sockets are non-blocking).
+        If nothing is pending the frame is written directly; whatever the kernel does not accept
+        is queued and the socket is handed to the writer thread."""
+        with self._send_lock:
+            pending = self._send_queues.get(neighbor_id)
+            if pending:
+                if len(pending) >= self.MAX_PENDING_FRAMES:
+                    raise BufferError(f"send queue full ({len(pending)} frames pending)")
+                pending.append(frame)
+                return
+            
+            try:
+                sent = neighbor_socket.send(frame)
+            except BlockingIOError:
+                sent = 0
+            if sent == len(frame):
+                return
+            
+            if pending is None:
+                pending = self._send_queues[neighbor_id] = deque()
+            pending.append(memoryview(frame)[sent:])
+            self._send_selector.register(neighbor_socket, selectors.EVENT_WRITE, neighbor_id)
+            self._writer_waker.wake()
+    
+    def _drain_send_queue(self, neighbor_id: str, neighbor_socket: socket.socket):
+        """Write as much of a neighbor's pending frames as the socket takes (caller holds _send_lock)"""
+        pending = self._send_queues.get(neighbor_id)
         try:
-            while self.running:
-                data = neighbor_socket.recv(4096)
-                if not data:
-                    break
+            while pending:
+                if self.USE_SENDMSG:
+                    # Gather the queued frames into one writev-style syscall
+                    bufs = list(itertools.islice(pending, self.MAX_IOV))
+                    sent = neighbor_socket.sendmsg(bufs)
+                else:
+                    bufs = [pending[0]]
+                    sent = neighbor_socket.send(bufs[0])
                 
+                # Drop fully written frames, keep the unwritten tail of a partial one
+                for buf in bufs:
+                    if sent >= len(buf):
+                        sent -= len(buf)
+                        pending.popleft()
+                    else:
+                        pending[0] = memoryview(buf)[sent:]
+                        return  # socket buffer is full; wait for the next writable event
+        except BlockingIOError:
+            return
+        except OSError as e:
+            self.logger.error(f"Error sending to {neighbor_id}: {e}")
+            pending.clear()
+        self._send_selector.unregister(neighbor_socket)
+    
+    def _drop_send_queue(self, neighbor_id: str, neighbor_socket: socket.socket):
+        """Forget pending frames for a neighbor whose connection is gone"""
+        with self._send_lock:
+            self._send_queues.pop(neighbor_id, None)
+            try:
+                self._send_selector.unregister(neighbor_socket)
+            except (KeyError, ValueError):
+                pass
+    
+    def _writer_loop(self):
+        """Flush queued frames to neighbors as their sockets become writable"""
+        try:
+            while self.running:
                 try:
-                    packet = Packet.from_json(data.decode('utf-8'))
-                    self._log_packet("RECEIVED", packet, neighbor_id)
-                    
-                    # For LSR, we need to ensure the routing algorithm knows about this neighbor
-                    if isinstance(self.routing_algorithm, LinkStateRouting):
-                        # Update neighbor as alive when we receive packets from them
-                        if neighbor_id not in self.routing_algorithm.neighbor_states:
-                            self.logger.info(f"LSR: Discovered active neighbor {neighbor_id}")
-                            self.routing_algorithm.update_neighbor(neighbor_id, {"cost": 1})
-                    
-                    self._process_packet(packet, neighbor_id)
-                except Exception as e:
-                    self.logger.error(f"Error processing packet from {neighbor_id}: {e}")
-        except Exception as e:
-            if self.running:
-                self.logger.warning(f"Lost connection to neighbor {neighbor_id}: {e}")
+                    events = self._send_selector.select()  # blocks until a socket is writable or a wakeup
+                except (OSError, ValueError):
+                    continue  # a socket was closed while selecting
+                with self._send_lock:
+                    for key, _ in events:
+                        if key.data is None:
+                            self._writer_waker.drain()
+                        elif key.data in self._send_queues:
+                            self._drain_send_queue(key.data, key.fileobj)
         finally:
-            if neighbor_id in self.active_connections:
-                del self.active_connections[neighbor_id]
-                self.logger.info(f"[DISCONNECTED] from neighbor {Colors.BOLD}{neighbor_id}{Colors.ENDC}")
-            neighbor_socket.close()
+            with self._send_lock:
+                self._send_selector.close()
+            self._writer_waker.close()
     
-    def _retry_connections(self):
-        """Periodically retry failed connections"""
-        while self.running:
-            time.sleep(15)  # Retry every 15 seconds
-            for neighbor_id, neighbor_info in self.neighbors.items():
-                if neighbor_id not in self.active_connections:
-                    self._try_connect_neighbor(neighbor_id, neighbor_info)
+    def _publish_connection(self, neighbor_id: str, neighbor_socket: socket.socket):
+        """Publish a new connections snapshot with neighbor_id -> neighbor_socket"""
+        with self._conn_lock:
+            connections = dict(self.active_connections)
+            connections[neighbor_id] = neighbor_socket
+            self.active_connections = types.MappingProxyType(connections)
+            self._flood_targets = {}
+    
+    def _unpublish_connection(self, neighbor_id: str, neighbor_socket: socket.socket) -> bool:
+        """Publish a snapshot without neighbor_id if it still maps to neighbor_socket; True if removed"""
+        with self._conn_lock:
+            if self.active_connections.get(neighbor_id) is not neighbor_socket:
+                return False
+            connections = dict(self.active_connections)
+            del connections[neighbor_id]
+            self.active_connections = types.MappingProxyType(connections)
+            self._flood_targets = {}
+            return True
+    
+    def _get_flood_targets(self, exclude_neighbor_id: Optional[str]) -> Tuple[Tuple[str, socket.socket], ...]:
+        """(neighbor_id, socket) pairs to flood to, precomputed once per excluded neighbor.
+        Connect/disconnect swap in a fresh cache dict, so a build racing with them is simply discarded."""
+        cache = self._flood_targets
+        targets = cache.get(exclude_neighbor_id)
+        if targets is None:
+            targets = tuple(
+                (neighbor_id, neighbor_socket)
+                for neighbor_id, neighbor_socket in self.active_connections.items()
+                if neighbor_id != exclude_neighbor_id
+            )
+            cache[exclude_neighbor_id] = targets
+        return targets
+    
+    def _fanout(self, frame: bytes, exclude_neighbor_id: Optional[str], action: str) -> List[str]:
+        """Send one pre-encoded frame to every connected neighbor except exclude_neighbor_id.
+        Returns the neighbor ids it was sent (or queued) to."""
+        sent = []
+        for neighbor_id, neighbor_socket in self._get_flood_targets(exclude_neighbor_id):
+            try:
+                self._enqueue_send(neighbor_id, neighbor_socket, frame)
+                sent.append(neighbor_id)
+            except Exception as e:
+                self.logger.error(f"Error {action} to {neighbor_id}: {e}")
+        return sent
     
     def _flood_packet(self, packet: Packet, exclude_neighbor_id: Optional[str]):
         """Flood packet to all neighbors except the specified neighbor_id"""
         self._ensure_msg_id(packet)
-        for neighbor_id, neighbor_socket in self.active_connections.items():
-            if exclude_neighbor_id and neighbor_id == exclude_neighbor_id:
-                continue
-            try:
-                neighbor_socket.send(packet.to_json().encode('utf-8'))
-                self._log_packet("FLOODED", packet, neighbor_id)
-            except Exception as e:
-                self.logger.error(f"Error flooding to {neighbor_id}: {e}")
+        for neighbor_id in self._fanout(packet.to_frame(), exclude_neighbor_id, "flooding"):
+            self._log_packet("FLOODED", packet, neighbor_id)
     
     def _flood_packet_except_sender(self, packet: Packet, exclude_neighbor_id: Optional[str]):
         """Flood packet to all neighbors except the sender (by neighbor_id)"""
         self._ensure_msg_id(packet)
-        flooded_count = 0
-        for neighbor_id, neighbor_socket in self.active_connections.items():
-            if exclude_neighbor_id and neighbor_id == exclude_neighbor_id:
-                continue
-            try:
-                neighbor_socket.send(packet.to_json().encode('utf-8'))
-                flooded_count += 1
-            except Exception as e:
-                self.logger.error(f"Error flooding LSA to {neighbor_id}: {e}")
-
+        flooded_count = len(self._fanout(packet.to_frame(), exclude_neighbor_id, "flooding LSA"))
         if flooded_count > 0:
             self._log_packet("FLOODED", packet, f"{flooded_count} neighbors")
     
     def _send_to_neighbor(self, packet: Packet, neighbor_id: str):
         """Send packet to specific neighbor"""
         self._ensure_msg_id(packet)
-        if neighbor_id in self.active_connections:
+        neighbor_socket = self.active_connections.get(neighbor_id)
+        if neighbor_socket is not None:
             try:
-                self.active_connections[neighbor_id].send(packet.to_json().encode('utf-8'))
+                self._enqueue_send(neighbor_id, neighbor_socket, packet.to_frame())
                 self._log_packet("FORWARDED", packet, neighbor_id)
             except Exception as e:
                 self.logger.error(f"Error sending to {neighbor_id}: {e}")
@@ -740,11 +1182,7 @@ class SocketRouter(BaseRouter):
     def _broadcast_packet(self, packet: Packet):
         """Broadcast packet to all active neighbors"""
         self._ensure_msg_id(packet)
-        for neighbor_id, neighbor_socket in self.active_connections.items():
-            try:
-                neighbor_socket.send(packet.to_json().encode('utf-8'))
-            except Exception as e:
-                self.logger.error(f"Error broadcasting to {neighbor_id}: {e}")
+        self._fanout(packet.to_frame(), None, "broadcasting")
     
     def _show_neighbors(self):
         """Show neighbor status"""
@@ -757,15 +1195,31 @@ class SocketRouter(BaseRouter):
     def stop(self):
         """Stop the router"""
         self.running = False
-        if self.socket:
-            self.socket.close()
-        for connection in self.active_connections.values():
-            connection.close()
+        self._stop_event.set()
+        for listen_socket in self._listen_sockets:
+            listen_socket.close()
+        for key in list((self._read_selector.get_map() or {}).values()):
+            if key.data is not None:
+                key.fileobj.close()
+        with self._send_lock:
+            self._send_queues.clear()
+        # The reactor and writer wake up, see running is False and close their own selectors
+        self._reactor_waker.wake()
+        self._writer_waker.wake()
+        self._inbox.put(None)
+        self._connect_pool.shutdown(wait=False, cancel_futures=True)
+        self._retry_wakeup.set()
+        self.routing_algorithm.stop()
         self.logger.info(f"Router {self.router_id} stopped")
 
 class RedisRouter(BaseRouter):
     """Redis pub/sub-based router implementation"""
     
+    # Outgoing publishes are buffered and sent in a single pipeline
+    PUBLISH_BATCH_SIZE = 64         # flush immediately once this many are pending
+    PUBLISH_FLUSH_INTERVAL = 0.001  # otherwise wait this long to coalesce more
+    READ_BATCH_SIZE = 64            # messages drained per wakeup before processing them together
+    
     def __init__(self, router_id: str, redis_host: str, redis_port: int, redis_password: str, algorithm: str):
         super().__init__(router_id, algorithm)
         self.redis_host = redis_host
@@ -774,132 +1228,80 @@ class RedisRouter(BaseRouter):
         self.redis_client = None
         self.pubsub = None
         self.node_channels = {}  # Node ID -> channel mapping
+        self._chan_cache: Dict[str, bytes] = {}  # Neighbor ID -> encoded channel name
+        self._channel_to_neighbor: Dict[str, str] = {}  # Channel name -> neighbor ID
+        self._flood_targets: Dict[Optional[str], Tuple[Tuple[str, bytes], ...]] = {}  # excluded ID -> targets
         self.my_channel = None
-        self.subscribed_channels = set()
         self.reader_task = None
         self.user_input_task = None
         self.periodic_task = None
+        self.flusher_task = None
+        self.cleanup_task = None  # set when stop() runs on the event loop thread
         self.event_loop = None
-        self.packet_log = []          # para mostrar "logs" en el CLI
-        self._rx_seen_ids = set()     # deduplicación (si ya lo agregaste, deja igual)
-        self._rx_seen_fifo = deque()
-        self._rx_seen_capacity = 50000
+        self._loop_thread_id = None  # thread running event_loop; only it may touch the publish buffer
+        self._publish_buffer = []     # pending (channel, data) publishes
+        self._publish_event = None    # asyncio.Event, created in start()
         self.active_connections = {} # Varible dummy
-
-    def _log_packet(self, action: str, packet, neighbor: str = None):
-        """Uniform packet activity log (mirrors Socket router)."""
-        timestamp = datetime.now().strftime("%H:%M:%S")
-        neighbor_info = f" via {neighbor}" if neighbor else ""
-        try:
-            mid = getattr(packet, "headers", {}).get("msg_id")
-        except Exception:
-            mid = None
-        mid_info = f" [id={mid}]" if mid else ""
-        log_entry = f"{timestamp} [{action}]{neighbor_info} {packet.type}{mid_info} from {packet.from_addr} to {packet.to_addr}"
-        self.packet_log.append(log_entry)
-        self.logger.info(log_entry)
-        if len(self.packet_log) > 100:
-            self.packet_log = self.packet_log[-100:]
-
-    @staticmethod
-    def _ensure_msg_id(packet):
-        """Ensure a stable unique id in packet.headers['msg_id'] for duplicate filtering."""
-        if not getattr(packet, "headers", None) or not isinstance(packet.headers, dict):
-            packet.headers = {}
-        if "msg_id" not in packet.headers:
-            packet.headers["msg_id"] = uuid.uuid4().hex
-
-    def _mark_rx_seen(self, packet) -> bool:
-        """Return True if packet.headers['msg_id'] was already seen (duplicate)."""
-        try:
-            mid = packet.headers.get("msg_id")
-        except Exception:
-            mid = None
-        if not mid:
-            return False
-        if mid in self._rx_seen_ids:
-            return True
-        if len(self._rx_seen_fifo) >= self._rx_seen_capacity:
-            old = self._rx_seen_fifo.popleft()
-            self._rx_seen_ids.discard(old)
-        self._rx_seen_fifo.append(mid)
-        self._rx_seen_ids.add(mid)
-        return False
-
-
     
-    def load_node_channels(self, names_file: str):
-        """Load node channel mappings from Redis names JSON file"""
+    def load_node_channels(self, names_file: Union[str, Dict]):
+        """Load node channel mappings from a Redis names JSON file path or parsed dict"""
         try:
-            with open(names_file, 'r') as f:
-                names_data = json.load(f)
-                if names_data.get("type") != "names":
-                    raise ValueError("Invalid names file format")
-                
-                self.node_channels = names_data["config"]
-                
-                # Set my channel
-                if self.router_id in self.node_channels:
-                    self.my_channel = self.node_channels[self.router_id]["channel"]
-                else:
-                    raise ValueError(f"Router ID '{self.router_id}' not found in names file")
-                
-                # Update neighbor information with channels
-                for neighbor_id in self.neighbors:
-                    if neighbor_id in self.node_channels:
-                        channel_info = self.node_channels[neighbor_id]
-                        self.neighbors[neighbor_id] = {
-                            "channel": channel_info["channel"],
-                            "cost": 1  # Default cost
-                        }
-                        # Update routing algorithm with complete neighbor info
-                        self.routing_algorithm.update_neighbor(neighbor_id, self.neighbors[neighbor_id])
-                
-                self.logger.info(f"Loaded channels for {len(self.node_channels)} nodes")
-                self.logger.info(f"My channel: {self.my_channel}")
+            names_data = self._load_config(names_file, "names")
+            
+            self.node_channels = names_data["config"]
+            
+            # Set my channel
+            if self.router_id in self.node_channels:
+                self.my_channel = self.node_channels[self.router_id]["channel"]
+            else:
+                raise ValueError(f"Router ID '{self.router_id}' not found in names file")
+            
+            # Update neighbor information with channels
+            for neighbor_id in self.neighbors:
+                if neighbor_id in self.node_channels:
+                    channel_info = self.node_channels[neighbor_id]
+                    self.neighbors[neighbor_id] = {
+                        "channel": channel_info["channel"],
+                        "cost": 1  # Default cost
+                    }
+                    # Update routing algorithm with complete neighbor info
+                    self.routing_algorithm.update_neighbor(neighbor_id, self.neighbors[neighbor_id])
+            
+            # Pre-encode neighbor channels once so publishes skip the str -> bytes step
+            self._chan_cache = {
+                neighbor_id: info["channel"].encode('utf-8')
+                for neighbor_id, info in self.neighbors.items()
+                if "channel" in info
+            }
+            self._channel_to_neighbor = {
+                info["channel"]: neighbor_id
+                for neighbor_id, info in self.neighbors.items()
+                if "channel" in info
+            }
+            self._flood_targets.clear()
+            
+            self.logger.info(f"Loaded channels for {len(self.node_channels)} nodes")
+            self.logger.info(f"My channel: {self.my_channel}")
+            
+            # Trigger initial routing calculation for LSR and Dijkstra
+            if isinstance(self.routing_algorithm, (DijkstraAlgorithm, LinkStateRouting)):
+                print(f"🔧 Triggering initial routing calculation for {self.router_id}")
                 
-                # Trigger initial routing calculation for LSR and Dijkstra
-                if isinstance(self.routing_algorithm, (DijkstraAlgorithm, LinkStateRouting)):
-                    print(f"🔧 Triggering initial routing calculation for {self.router_id}")
-                    
         except Exception as e:
             self.logger.error(f"Error loading node channels: {e}")
             raise
     
-    def load_node_addresses(self, names_file: str):
+    def load_node_addresses(self, names_file: Union[str, Dict]):
         """For Redis router, this is equivalent to load_node_channels"""
         self.load_node_channels(names_file)
 
-    @staticmethod
-    def _ensure_msg_id(packet):
-        """Ensure a stable unique id in packet.headers['msg_id'] for duplicate filtering."""
-        if not getattr(packet, "headers", None) or not isinstance(packet.headers, dict):
-            packet.headers = {}
-        if "msg_id" not in packet.headers:
-            packet.headers["msg_id"] = uuid.uuid4().hex
-
-    def _mark_rx_seen(self, packet) -> bool:
-        """Return True if packet.headers['msg_id'] was already seen (duplicate)."""
-        try:
-            mid = packet.headers.get("msg_id")
-        except Exception:
-            mid = None
-        if not mid:
-            return False
-        if mid in self._rx_seen_ids:
-            return True
-        if len(self._rx_seen_fifo) >= self._rx_seen_capacity:
-            old = self._rx_seen_fifo.popleft()
-            self._rx_seen_ids.discard(old)
-        self._rx_seen_fifo.append(mid)
-        self._rx_seen_ids.add(mid)
-        return False
 
     
     async def start(self):
         """Start the Redis router"""
         self.running = True
         self.event_loop = asyncio.get_event_loop()
+        self._loop_thread_id = threading.get_ident()
         
         try:
             # Connect to Redis
@@ -907,7 +1309,9 @@ class RedisRouter(BaseRouter):
                 host=self.redis_host, 
                 port=self.redis_port, 
                 password=self.redis_password,
-                decode_responses=True
+                decode_responses=True,
+                max_connections=32,     # pooled connections shared by concurrent publishes
+                socket_keepalive=True
             )
             
             # Test connection
@@ -930,177 +1334,193 @@ class RedisRouter(BaseRouter):
                         if neighbor_channel != self.my_channel:  # Don't double-subscribe
                             channels_to_subscribe.append(neighbor_channel)
             
-            # Remove duplicates
-            channels_to_subscribe = list(set(channels_to_subscribe))
+            # Remove duplicates, keeping subscribe order deterministic (own channel first)
+            channels_to_subscribe = list(dict.fromkeys(channels_to_subscribe))
             
             await self.pubsub.subscribe(*channels_to_subscribe)
-            self.subscribed_channels = set(channels_to_subscribe)
             
             self.logger.info(f"Router {Colors.BOLD}{self.router_id}{Colors.ENDC} started with Redis pub/sub")
             self.logger.info(f"Using routing algorithm: {Colors.BOLD}{self.routing_algorithm.get_name()}{Colors.ENDC}")
             self.logger.info(f"Subscribed to channels: {channels_to_subscribe}")
             
+            # Start publish flusher (before anything can queue a publish)
+            self._publish_event = asyncio.Event()
+            self.flusher_task = asyncio.create_task(self._publish_flusher())
+            
             # Start message reader task
             self.reader_task = asyncio.create_task(self._message_reader())
             
             # Start periodic tasks
             self.periodic_task = asyncio.create_task(self._async_periodic_tasks())
             
-            # Start user input handler in a separate thread (since input() is blocking)
-            input_thread = threading.Thread(target=self._handle_user_input)
-            input_thread.daemon = True
-            input_thread.start()
+            # Serve user commands from stdin on the event loop
+            self._start_user_input(self.event_loop)
             
             # Wait for tasks to complete
-            await asyncio.gather(self.reader_task, self.periodic_task)
+            await asyncio.gather(self.reader_task, self.periodic_task, self.flusher_task)
+            if self.cleanup_task is not None:
+                await self.cleanup_task
             
         except Exception as e:
             self.logger.error(f"Error starting Redis router: {e}")
             raise
     
     async def _message_reader(self):
-        """Read messages from Redis pub/sub"""
+        """Read messages from Redis pub/sub: park until one arrives, drain whatever else is
+        already buffered (up to READ_BATCH_SIZE), then process them as one batch.
+        stop() cancels this task, so waiting without a timeout needs no idle wakeups."""
         try:
             while self.running:
-                message = await self.pubsub.get_message(ignore_subscribe_messages=True, timeout=1.0)
-                if message is not None:
-                    try:
-                        # Parse the packet
-                        packet_data = message['data']
-                        packet = Packet.from_json(packet_data)
-                        
-                        # Skip packets that we sent ourselves to avoid loops
-                        if packet.from_addr == self.router_id:
-                            continue
-                        
-                        # Determine which neighbor sent this (if any)
-                        from_neighbor_id = self._get_neighbor_by_channel(message['channel'])
-                        
-                        # If we received this on our own channel, it means someone sent it TO us
-                        # If we received this on a neighbor's channel, it's a broadcast/multicast
-                        if message['channel'] == self.my_channel:
-                            # Direct message to us
-                            self._log_packet("RECEIVED", packet, from_neighbor_id)
-                            self._process_packet(packet, from_neighbor_id)
-                        else:
-                            # Broadcast/multicast message from a neighbor
-                            # Only process if it's truly from that neighbor (not a loop)
-                            if from_neighbor_id and packet.from_addr != self.router_id:
-                                self._log_packet("RECEIVED", packet, from_neighbor_id)
-                                self._process_packet(packet, from_neighbor_id)
-                        
-                    except Exception as e:
-                        self.logger.error(f"Error processing message: {e}")
-                        
+                message = await self.pubsub.get_message(ignore_subscribe_messages=True, timeout=None)
+                if message is None:
+                    continue
+                batch = []
+                while message is not None:
+                    item = self._decode_message(message)
+                    if item is not None:
+                        batch.append(item)
+                    if len(batch) >= self.READ_BATCH_SIZE:
+                        break
+                    message = await self.pubsub.get_message(ignore_subscribe_messages=True, timeout=0.0)
+                self._process_batch(batch)
+        
         except asyncio.CancelledError:
             self.logger.info("Message reader cancelled")
         except Exception as e:
             self.logger.error(f"Error in message reader: {e}")
     
+    def _decode_message(self, message: Dict) -> Optional[Tuple[Packet, Optional[str]]]:
+        """Decode one pub/sub message into (packet, from_neighbor_id); None if it is to be ignored"""
+        try:
+            # Parse the packet
+            packet = Packet.from_json(message['data'])
+            
+            # Skip packets that we sent ourselves to avoid loops
+            if packet.from_addr == self.router_id:
+                return None
+            
+            # Determine which neighbor sent this (if any)
+            from_neighbor_id = self._get_neighbor_by_channel(message['channel'])
+            
+            # If we received this on our own channel, it means someone sent it TO us
+            # If we received this on a neighbor's channel, it's a broadcast/multicast
+            # Only process the latter if it's truly from that neighbor (not a loop)
+            if message['channel'] != self.my_channel and not from_neighbor_id:
+                return None
+            
+            self._log_packet("RECEIVED", packet, from_neighbor_id)
+            return packet, from_neighbor_id
+        except Exception as e:
+            self.logger.error(f"Error processing message: {e}")
+            return None
+    
     async def _async_periodic_tasks(self):
-        """Handle periodic tasks asynchronously"""
+        """Run the algorithm's periodic tasks (see BaseRouter._schedule_periodic) as event loop timers"""
+        loop = asyncio.get_running_loop()
+        scheduler = _LoopScheduler(loop)
+        self._schedule_periodic(scheduler)
         try:
-            while self.running:
-                await asyncio.sleep(5)  # Check every 5 seconds
-                
-                try:
-                    # Send hello packets for LSR
-                    if isinstance(self.routing_algorithm, LinkStateRouting):
-                        if self.routing_algorithm.should_send_hello():
-                            hello_packet = self.routing_algorithm.create_hello_packet()
-                            await self._broadcast_packet_async(hello_packet)
-                            self._log_packet("SENT", hello_packet, "multicast")
-                        
-                        # Send LSA if needed
-                        if self.routing_algorithm.should_send_lsa():
-                            lsa_packet = self.routing_algorithm.create_lsa_packet()
-                            await self._broadcast_packet_async(lsa_packet)
-                            self._log_packet("SENT", lsa_packet, "broadcast")
-                        
-                        # Check for dead neighbors and age LSA database
-                        try:
-                            self.routing_algorithm._check_neighbor_timeouts()
-                        except Exception as e:
-                            self.logger.error(f"Error checking neighbor timeouts: {e}")
-                        
-                        try:
-                            self.routing_algorithm._age_lsa_database()
-                        except Exception as e:
-                            self.logger.error(f"Error aging LSA database: {e}")
-                    
-                    # For Dijkstra algorithm - no periodic packets needed
-                    elif isinstance(self.routing_algorithm, DijkstraAlgorithm):
-                        pass
-                    
-                    # Send basic hello for flooding (neighbor discovery)
-                    else:
-                        hello_packet = Packet(
-                            proto=self.routing_algorithm.get_name(),
-                            packet_type="hello",
-                            from_addr=self.router_id,
-                            to_addr="broadcast",
-                            payload=f"Hello from {self.router_id}"
-                        )
-                        await self._broadcast_packet_async(hello_packet)
-                        
-                except Exception as e:
-                    self.logger.error(f"Error in periodic tasks: {e}")
-                    import traceback
-                    self.logger.error(f"Traceback: {traceback.format_exc()}")
-                    
+            await loop.create_future()  # timers do the work; stop() cancels this task
         except asyncio.CancelledError:
             self.logger.info("Periodic tasks cancelled")
+        finally:
+            scheduler.cancel_all()
+    
+    def _queue_publish(self, channel: bytes, data: bytes):
+        """Buffer a publish; it is sent on the next pipeline flush (event loop only)"""
+        self._publish_buffer.append((channel, data))
+        self._publish_event.set()
+    
+    async def _publish_flusher(self):
+        """Flush buffered publishes as one non-transactional pipeline"""
+        try:
+            while self.running:
+                await self._publish_event.wait()
+                if len(self._publish_buffer) < self.PUBLISH_BATCH_SIZE:
+                    await asyncio.sleep(self.PUBLISH_FLUSH_INTERVAL)
+                self._publish_event.clear()
+                await self._flush_publishes()
+        except asyncio.CancelledError:
+            self.logger.info("Publish flusher cancelled")
         except Exception as e:
-            self.logger.error(f"Error in periodic tasks: {e}")
+            self.logger.error(f"Error in publish flusher: {e}")
+    
+    async def _flush_publishes(self):
+        """Send all buffered publishes in a single round trip"""
+        batch, self._publish_buffer = self._publish_buffer, []
+        if not batch:
+            return
+        pipe = self.redis_client.pipeline(transaction=False)
+        for channel, data in batch:
+            pipe.publish(channel, data)
+        try:
+            await pipe.execute()
+        except Exception as e:
+            self.logger.error(f"Error publishing batch of {len(batch)} packets: {e}")
     
     def _get_neighbor_by_channel(self, channel: str) -> Optional[str]:
         """Get neighbor ID by channel name"""
-        for neighbor_id, neighbor_info in self.neighbors.items():
-            if neighbor_info.get("channel") == channel:
-                return neighbor_id
-        return None
+        return self._channel_to_neighbor.get(channel)
+    
+    def _get_flood_targets(self, exclude_neighbor_id: Optional[str]) -> Tuple[Tuple[str, bytes], ...]:
+        """(neighbor_id, channel) pairs to flood to, precomputed once per excluded neighbor"""
+        targets = self._flood_targets.get(exclude_neighbor_id)
+        if targets is None:
+            targets = tuple(
+                (neighbor_id, channel) for neighbor_id, channel in self._chan_cache.items()
+                if neighbor_id != exclude_neighbor_id
+            )
+            self._flood_targets[exclude_neighbor_id] = targets
+        return targets
+    
+    def _in_loop(self, func, *args):
+        """Run func on the event loop: directly when already there (packet processing, periodic
+        tasks), otherwise handed over in FIFO order (user input thread), so sends keep their order"""
+        if threading.get_ident() == self._loop_thread_id:
+            func(*args)
+        elif self.event_loop is not None and self.event_loop.is_running():
+            self.event_loop.call_soon_threadsafe(func, *args)
+        else:
+            self.logger.warning("No event loop available to send packet")
     
     def _flood_packet(self, packet: Packet, exclude_neighbor_id: Optional[str]):
         """Flood packet to all neighbors except the specified neighbor_id"""
-        self._schedule_async_task(self._flood_packet_async(packet, exclude_neighbor_id))
+        self._in_loop(self._queue_flood, packet, exclude_neighbor_id)
     
-    async def _flood_packet_async(self, packet: Packet, exclude_neighbor_id: Optional[str]):
-        """Async version of flood packet"""
+    def _queue_flood(self, packet: Packet, exclude_neighbor_id: Optional[str]):
+        """Queue packet for every neighbor channel except exclude_neighbor_id's (event loop only)"""
         self._ensure_msg_id(packet)
+        data = packet.to_bytes()  # encoded once, published to every channel
         flooded_count = 0
         
-        for neighbor_id, neighbor_info in self.neighbors.items():
-            if exclude_neighbor_id and neighbor_id == exclude_neighbor_id:
-                continue
-            
-            if "channel" in neighbor_info:
-                try:
-                    # For flooding, send to each neighbor's channel individually
-                    await self.redis_client.publish(neighbor_info["channel"], packet.to_json())
-                    flooded_count += 1
-                except Exception as e:
-                    self.logger.error(f"Error flooding to {neighbor_id}: {e}")
+        for neighbor_id, channel in self._get_flood_targets(exclude_neighbor_id):
+            try:
+                # For flooding, send to each neighbor's channel individually
+                self._queue_publish(channel, data)
+                flooded_count += 1
+            except Exception as e:
+                self.logger.error(f"Error flooding to {neighbor_id}: {e}")
         
         if flooded_count > 0:
             self._log_packet("FLOODED", packet, f"{flooded_count} neighbors")
     
     def _flood_packet_except_sender(self, packet: Packet, exclude_neighbor_id: Optional[str]):
         """Flood packet to all neighbors except the sender (by neighbor_id)"""
-        self._schedule_async_task(self._flood_packet_async(packet, exclude_neighbor_id))
+        self._in_loop(self._queue_flood, packet, exclude_neighbor_id)
     
     def _send_to_neighbor(self, packet: Packet, neighbor_id: str):
         """Send packet to specific neighbor"""
-        self._schedule_async_task(self._send_to_neighbor_async(packet, neighbor_id))
+        self._in_loop(self._queue_to_neighbor, packet, neighbor_id)
     
-    async def _send_to_neighbor_async(self, packet: Packet, neighbor_id: str):
-        """Async version of send to neighbor"""
+    def _queue_to_neighbor(self, packet: Packet, neighbor_id: str):
+        """Queue packet for one neighbor's channel (event loop only)"""
         self._ensure_msg_id(packet)
         
-        if neighbor_id in self.neighbors and "channel" in self.neighbors[neighbor_id]:
+        channel = self._chan_cache.get(neighbor_id)
+        if channel is not None:
             try:
                 # For direct messages, send to the neighbor's channel (they listen on their own channel)
-                channel = self.neighbors[neighbor_id]["channel"]
-                await self.redis_client.publish(channel, packet.to_json())
+                self._queue_publish(channel, packet.to_bytes())
                 self._log_packet("FORWARDED", packet, neighbor_id)
             except Exception as e:
                 self.logger.error(f"Error sending to {neighbor_id}: {e}")
@@ -1109,18 +1529,18 @@ class RedisRouter(BaseRouter):
     
     def _broadcast_packet(self, packet: Packet):
         """Broadcast packet to all active neighbors"""
-        self._schedule_async_task(self._broadcast_packet_async(packet))
+        self._in_loop(self._queue_broadcast, packet)
     
-    async def _broadcast_packet_async(self, packet: Packet):
-        """Async version of broadcast packet"""
+    def _queue_broadcast(self, packet: Packet):
+        """Queue packet for every neighbor channel (event loop only)"""
         self._ensure_msg_id(packet)
+        data = packet.to_bytes()  # encoded once, published to every channel
         
-        for neighbor_id, neighbor_info in self.neighbors.items():
-            if "channel" in neighbor_info:
-                try:
-                    await self.redis_client.publish(neighbor_info["channel"], packet.to_json())
-                except Exception as e:
-                    self.logger.error(f"Error broadcasting to {neighbor_id}: {e}")
+        for neighbor_id, channel in self._get_flood_targets(None):
+            try:
+                self._queue_publish(channel, data)
+            except Exception as e:
+                self.logger.error(f"Error broadcasting to {neighbor_id}: {e}")
     
     def _show_neighbors(self):
         """Show neighbor status"""
@@ -1135,6 +1555,7 @@ class RedisRouter(BaseRouter):
     def stop(self):
         """Stop the router"""
         self.running = False
+        self._stop_event.set()
         
         # Cancel async tasks
         if self.reader_task and not self.reader_task.done():
@@ -1143,15 +1564,22 @@ class RedisRouter(BaseRouter):
         if self.periodic_task and not self.periodic_task.done():
             self.periodic_task.cancel()
         
+        if self.flusher_task and not self.flusher_task.done():
+            self.flusher_task.cancel()
+        
         # Close Redis connections using the same async scheduling mechanism
         if self.pubsub:
-            self._schedule_async_task(self._cleanup_redis())
+            self.cleanup_task = self._schedule_async_task(self._cleanup_redis())
         
+        self.routing_algorithm.stop()
         self.logger.info(f"Redis router {self.router_id} stopped")
     
     async def _cleanup_redis(self):
         """Clean up Redis connections"""
         try:
+            if self.redis_client:
+                await self._flush_publishes()
+            
             if self.pubsub:
                 await self.pubsub.unsubscribe()
                 await self.pubsub.close()
@@ -1161,8 +1589,11 @@ class RedisRouter(BaseRouter):
         except Exception as e:
             self.logger.error(f"Error cleaning up Redis connections: {e}")
     
-    def _schedule_async_task(self, coro):
-        """Schedule an async task from sync context"""
+    def _schedule_async_task(self, coro) -> Optional[asyncio.Task]:
+        """Schedule an async task from sync context (returns the task when called on the event loop)"""
+        if threading.get_ident() == self._loop_thread_id:
+            # Already on the loop (e.g. "quit" at the prompt): waiting for the result here would block it
+            return self.event_loop.create_task(coro)
         if self.event_loop and self.event_loop.is_running():
             try:
                 # Create task in the running loop
@@ -1177,10 +1608,11 @@ class RedisRouter(BaseRouter):
                 self.logger.error(f"Error scheduling async task: {e}")
         else:
             self.logger.warning("No event loop available to schedule async task")
+        return None
 
 
-    def _handle_user_input(self):
-        """Simple CLI for Redis mode: send/echo/inspect/quit"""
+    def _print_commands(self):
+        """Print the available commands (Redis mode)"""
         print(f"\n{Colors.BOLD}Router {self.router_id} (Redis) ready.{Colors.ENDC} Commands:")
         print(f"  {Colors.CYAN}send <destination> <message>{Colors.ENDC} - Send message to destination")
         print(f"  {Colors.CYAN}echo <destination>{Colors.ENDC} - Send echo to destination")
@@ -1190,76 +1622,63 @@ class RedisRouter(BaseRouter):
         print(f"  {Colors.CYAN}topology{Colors.ENDC} - Show network topology")
         print(f"  {Colors.CYAN}quit{Colors.ENDC} - Exit router")
 
-        while self.running:
-            try:
-                cmd = input(f"\n{Colors.BOLD}{self.router_id}>{Colors.ENDC} ").strip().split()
-                if not cmd:
-                    continue
-
-                if cmd[0] == "send" and len(cmd) >= 3:
-                    destination = cmd[1]
-                    message = " ".join(cmd[2:])
-                    packet = Packet(
-                        proto=self.routing_algorithm.get_name(),
-                        packet_type="message",
-                        from_addr=self.router_id,
-                        to_addr=destination,
-                        ttl=5,
-                        headers=[self.router_id],
-                        payload=message
-                    )
-                    self._forward_packet(packet)
-                    self._log_packet("SENT", packet)
-
-                elif cmd[0] == "echo" and len(cmd) >= 2:
-                    destination = cmd[1]
-                    packet = Packet(
-                        proto=self.routing_algorithm.get_name(),
-                        packet_type="echo",
-                        from_addr=self.router_id,
-                        to_addr=destination,
-                        ttl=5,
-                        headers=[self.router_id],
-                        payload="Echo request"
-                    )
-                    self._forward_packet(packet)
-                    self._log_packet("SENT", packet)
+    def _handle_command(self, cmd: List[str]):
+        """Simple CLI for Redis mode: send/echo/inspect/quit"""
+        if cmd[0] == "send" and len(cmd) >= 3:
+            destination = cmd[1]
+            message = " ".join(cmd[2:])
+            packet = Packet(
+                proto=self.routing_algorithm.get_name(),
+                packet_type="message",
+                from_addr=self.router_id,
+                to_addr=destination,
+                ttl=5,
+                headers={"path": [self.router_id]},
+                payload=message
+            )
+            self._forward_packet(packet)
+            self._log_packet("SENT", packet)
 
-                elif cmd[0] == "neighbors":
-                    print(f"{Colors.BOLD}Neighbors:{Colors.ENDC}")
-                    # Usa la topología cargada para listar vecinos
-                    neighs = self.topology.get(self.router_id, [])
-                    for nid in neighs:
-                        ch = self.node_channels.get(nid, {}).get("channel", "unknown")
-                        print(f"  {Colors.YELLOW}{nid}{Colors.ENDC}: channel={ch}")
+        elif cmd[0] == "echo" and len(cmd) >= 2:
+            destination = cmd[1]
+            packet = Packet(
+                proto=self.routing_algorithm.get_name(),
+                packet_type="echo",
+                from_addr=self.router_id,
+                to_addr=destination,
+                ttl=5,
+                headers={"path": [self.router_id]},
+                payload="Echo request"
+            )
+            self._forward_packet(packet)
+            self._log_packet("SENT", packet)
 
-                elif cmd[0] == "routes":
-                    print(f"{Colors.BOLD}Routing table:{Colors.ENDC}")
-                    for dest, next_hop in self.routing_algorithm.routing_table.items():
-                        print(f"  {Colors.YELLOW}{dest}{Colors.ENDC} -> {Colors.CYAN}{next_hop}{Colors.ENDC}")
+        elif cmd[0] == "neighbors":
+            print(f"{Colors.BOLD}Neighbors:{Colors.ENDC}")
+            # Usa la topología cargada para listar vecinos
+            neighs = self.topology.get(self.router_id, [])
+            for nid in neighs:
+                ch = self.node_channels.get(nid, {}).get("channel", "unknown")
+                print(f"  {Colors.YELLOW}{nid}{Colors.ENDC}: channel={ch}")
 
-                elif cmd[0] == "topology":
-                    print(f"{Colors.BOLD}Network topology:{Colors.ENDC}")
-                    for node, neighs in self.topology.items():
-                        status = f"{Colors.GREEN}(this node){Colors.ENDC}" if node == self.router_id else ""
-                        print(f"  {Colors.YELLOW}{node}{Colors.ENDC}{status}: {neighs}")
+        elif cmd[0] == "routes":
+            print(f"{Colors.BOLD}Routing table:{Colors.ENDC}")
+            for dest, next_hop in self.routing_algorithm.routing_table.items():
+                print(f"  {Colors.YELLOW}{dest}{Colors.ENDC} -> {Colors.CYAN}{next_hop}{Colors.ENDC}")
 
-                elif cmd[0] == "logs":
-                    print(f"{Colors.BOLD}Recent packet logs:{Colors.ENDC}")
-                    for log_entry in self.packet_log[-10:]:
-                        print(f"  {log_entry}")
+        elif cmd[0] == "topology":
+            print(f"{Colors.BOLD}Network topology:{Colors.ENDC}")
+            for node, neighs in self.topology.items():
+                status = f"{Colors.GREEN}(this node){Colors.ENDC}" if node == self.router_id else ""
+                print(f"  {Colors.YELLOW}{node}{Colors.ENDC}{status}: {neighs}")
 
-                elif cmd[0] == "quit":
-                    self.stop()
-                    break
+        elif cmd[0] == "logs":
+            print(f"{Colors.BOLD}Recent packet logs:{Colors.ENDC}")
+            for log_entry in itertools.islice(self.packet_log, max(0, len(self.packet_log) - 10), None):
+                print(f"  {log_entry}")
 
-                else:
-                    print(f"{Colors.RED}Unknown command{Colors.ENDC}")
+        elif cmd[0] == "quit":
+            self.stop()
 
-            except KeyboardInterrupt:
-                self.stop()
-                break
-            except Exception as e:
-                print(f"{Colors.RED}Error: {e}{Colors.ENDC}")
-
-        
\ No newline at end of file
+        else:
+            print(f"{Colors.RED}Unknown command{Colors.ENDC}")
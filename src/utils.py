@@ -1,4 +1,5 @@
 import logging
+import re
 
 class Colors:
     RED = '\033[91m'
@@ -23,11 +24,14 @@ class ColoredFormatter(logging.Formatter):
         'INFO': Colors.WHITE
     }
     
+    # One scan per line instead of one substring search per action
+    ACTION_RE = re.compile(r"\[(" + "|".join(COLOR_MAP) + r")\]")
+    
     def format(self, record):
         log_message = super().format(record)
-        for action, color in self.COLOR_MAP.items():
-            if f'[{action}]' in log_message:
-                return f"{color}{log_message}{Colors.ENDC}"
+        match = self.ACTION_RE.search(log_message)
+        if match:
+            return f"{self.COLOR_MAP[match.group(1)]}{log_message}{Colors.ENDC}"
         return log_message
 
 # Configure colored logging